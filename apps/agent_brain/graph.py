@@ -1,66 +1,129 @@
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, ValidationError
-import json, os, pathlib
+from typing import TypedDict
+from collections import OrderedDict
+import os, pathlib, hashlib, logging
+import httpx
+import orjson
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from libs.schemas.proposal import Proposal, RiskParams, Evidence
-from apps.rag.collector import collect
-
-
-class State(dict):
-    pass
-
-
-def node_reader(s: State):
+from apps.rag.collector import collect_async
+
+
+class State(TypedDict, total=False):
+    # Each branch of the proposer/skeptic fan-out writes its own key, so the
+    # default last-value channels merge deterministically at the referee.
+    text: str
+    horizon_minutes: int
+    notes: str
+    docs: list
+    draft: str
+    critique: str
+    proposal: dict
+
+
+# Prompt templates are static, so read them once. They go out as the system
+# message ahead of the per-call docs/draft, keeping the request prefix
+# byte-identical across calls for provider-side prompt caching.
+_PROMPTS = {
+    name: (pathlib.Path(__file__).parent / "prompts" / f"{name}.md").read_text()
+    for name in ("proposer", "skeptic", "referee")
+}
+_PROPOSER_SYSTEM = f"{_PROMPTS['proposer']}\n\nOutput strictly JSON for Proposal."
+
+# Deterministic draft, serialised once at import
+_STUB_PROPOSAL_JSON = Proposal(
+    action="open",
+    symbol="BTCUSDT",
+    side="buy",
+    size_bps_equity=4.0,
+    horizon_minutes=120,
+    thesis="ETF inflow headline",
+    risk=RiskParams(stop_loss_bps=60, take_profit_bps=120, max_slippage_bps=3),
+    evidence=[Evidence(url="https://example.com", type="news_headline")],
+    confidence=0.74,
+).model_dump_json()
+
+_LLM = None
+
+
+def _llm() -> ChatOpenAI:
+    # One client per process so LLM calls reuse pooled connections
+    global _LLM
+    if _LLM is None:
+        _LLM = ChatOpenAI(
+            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            temperature=0,
+            http_async_client=httpx.AsyncClient(timeout=float(os.getenv("OPENAI_TIMEOUT_S", "60"))),
+        )
+    return _LLM
+
+
+# Exact-match response cache: at temperature=0 the same prompt yields the same
+# answer, and re-runs over an unchanged news batch are common.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+_LLM_CACHE: "OrderedDict[str, str]" = OrderedDict()
+
+
+async def _cached_invoke(system: str, user: str) -> str:
+    llm = _llm()
+    key = hashlib.sha256(orjson.dumps({"model": llm.model_name, "system": system, "user": user}, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    hit = _LLM_CACHE.get(key)
+    if hit is not None:
+        _LLM_CACHE.move_to_end(key)
+        return hit
+    res = await llm.ainvoke([SystemMessage(content=system), HumanMessage(content=user)])
+    _LLM_CACHE[key] = res.content
+    if len(_LLM_CACHE) > LLM_CACHE_SIZE:
+        _LLM_CACHE.popitem(last=False)
+    return res.content
+
+
+DOCS_BUDGET_BYTES = 4000
+
+
+def _docs_blob(docs: list) -> str:
+    # Encode docs one at a time and stop once the budget is filled, rather than
+    # serialising the whole list; same bytes as orjson.dumps(docs)[:budget].
+    buf = bytearray(b"[")
+    for i, d in enumerate(docs):
+        if len(buf) >= DOCS_BUDGET_BYTES:
+            break
+        if i:
+            buf += b","
+        buf += orjson.dumps(d)
+    else:
+        buf += b"]"
+    # "ignore" drops a codepoint split at the cut
+    return bytes(buf[:DOCS_BUDGET_BYTES]).decode("utf-8", "ignore")
+
+
+async def node_reader(s: State):
     mode = os.getenv("AGENT_MODE", "deterministic").lower()
-    docs = collect(query=s.get("text", ""), horizon_minutes=int(s.get("horizon_minutes", 120)))
+    docs = await collect_async(query=s.get("text", ""), horizon_minutes=int(s.get("horizon_minutes", 120)))
     return {"notes": f"{len(docs)} docs retrieved", "docs": docs}
 
 
-def node_proposer(s: State):
+async def node_proposer(s: State):
     # In deterministic mode, emit a fixed draft JSON string
     mode = os.getenv("AGENT_MODE", "deterministic").lower()
     if mode != "llm":
-        draft = Proposal(
-            action="open",
-            symbol="BTCUSDT",
-            side="buy",
-            size_bps_equity=4.0,
-            horizon_minutes=120,
-            thesis="ETF inflow headline",
-            risk=RiskParams(stop_loss_bps=60, take_profit_bps=120, max_slippage_bps=3),
-            evidence=[Evidence(url="https://example.com", type="news_headline")],
-            confidence=0.74,
-        ).model_dump()
-        return {"draft": json.dumps(draft)}
+        return {"draft": _STUB_PROPOSAL_JSON}
     # LLM path
     try:
         _ = os.environ.get("OPENAI_API_KEY")
         if not _:
             raise RuntimeError("missing OPENAI_API_KEY")
-        llm = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"), temperature=0)
-        prompt_path = pathlib.Path(__file__).parent / "prompts" / "proposer.md"
-        prompt = prompt_path.read_text()
-        docs = s.get("docs", [])
-        content = f"{prompt}\n\nDocs: {json.dumps(docs)[:4000]}\n\nOutput strictly JSON for Proposal."
-        res = llm.invoke(content)
-        return {"draft": res.content}
+        user = f"Docs: {_docs_blob(s.get('docs', []))}"
+        return {"draft": await _cached_invoke(_PROPOSER_SYSTEM, user)}
     except Exception:
         # fallback to stub on any error
-        draft = Proposal(
-            action="open",
-            symbol="BTCUSDT",
-            side="buy",
-            size_bps_equity=4.0,
-            horizon_minutes=120,
-            thesis="ETF inflow headline",
-            risk=RiskParams(stop_loss_bps=60, take_profit_bps=120, max_slippage_bps=3),
-            evidence=[Evidence(url="https://example.com", type="news_headline")],
-            confidence=0.74,
-        ).model_dump()
-        return {"draft": json.dumps(draft)}
-
-
-def node_skeptic(s: State):
+        return {"draft": _STUB_PROPOSAL_JSON}
+
+
+async def node_skeptic(s: State):
+    # Critiques the retrieved docs only, so it can run alongside the proposer
     mode = os.getenv("AGENT_MODE", "deterministic").lower()
     if mode != "llm":
         return {"critique": "risk acceptable; check slippage; ensure evidence cites official source"}
@@ -68,61 +131,60 @@ def node_skeptic(s: State):
         _ = os.environ.get("OPENAI_API_KEY")
         if not _:
             raise RuntimeError("missing OPENAI_API_KEY")
-        llm = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"), temperature=0)
-        prompt = (pathlib.Path(__file__).parent / "prompts" / "skeptic.md").read_text()
-        content = f"{prompt}\n\nDraft: {s.get('draft','')[:4000]}\n\nDocs: {json.dumps(s.get('docs', []))[:4000]}"
-        res = llm.invoke(content)
-        return {"critique": res.content}
+        user = f"Docs: {_docs_blob(s.get('docs', []))}"
+        return {"critique": await _cached_invoke(_PROMPTS["skeptic"], user)}
     except Exception:
         return {"critique": "risk acceptable; check slippage; ensure evidence cites official source"}
 
 
+_REQUIRED_KEYS = ("symbol", "side", "size_bps_equity", "risk")
+
+
 def _compute_consensus(draft: dict, critique: str) -> float:
     # Simple heuristic consensus score for scaffold
-    required_keys = ["symbol", "side", "size_bps_equity", "risk"]
-    present = sum(1 for k in required_keys if k in draft)
+    present = sum(1 for k in _REQUIRED_KEYS if k in draft)
     penalty = 0.0 if "invalid" not in critique.lower() else 0.5
-    return max(0.0, min(1.0, present / len(required_keys) - penalty))
+    return max(0.0, min(1.0, present / len(_REQUIRED_KEYS) - penalty))
 
 
-def node_referee(s: State):
+async def node_referee(s: State):
+    # Parse and validate the draft in one pass
+    draft = s.get("draft") or "{}"
     try:
-        data = json.loads(s["draft"]) if isinstance(s.get("draft"), str) else s.get("draft", {})
-    except Exception:
-        raise RuntimeError("invalid draft JSON")
+        proposal = Proposal.model_validate_json(draft) if isinstance(draft, str) else Proposal.model_validate(draft)
+    except ValidationError as e:
+        raise RuntimeError(f"invalid proposal: {e}")
+    critique = s.get("critique", "")
     # Compute consensus score from draft and critique
-    consensus_score = _compute_consensus(data, s.get("critique", ""))
+    consensus_score = _compute_consensus(proposal.model_dump(mode="json"), critique)
     min_consensus = float(os.getenv("CONSENSUS_MIN", "0.6"))
-    data["consensus_score"] = consensus_score
-    # Optional LLM refinement
+    # Optional LLM refinement; output that isn't JSON keeps the draft, JSON that
+    # doesn't validate is rejected
     mode = os.getenv("AGENT_MODE", "deterministic").lower()
     if mode == "llm":
+        refined = None
         try:
             _ = os.environ.get("OPENAI_API_KEY")
             if not _:
                 raise RuntimeError("missing OPENAI_API_KEY")
-            llm = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"), temperature=0)
-            prompt = (pathlib.Path(__file__).parent / "prompts" / "referee.md").read_text()
-            content = f"{prompt}\n\nDraft: {json.dumps(data)}\n\nCritique: {s.get('critique','')}\n\nDocs: {json.dumps(s.get('docs', []))[:4000]}"
-            res = llm.invoke(content)
+            user = f"Draft: {proposal.model_dump_json()}\n\nCritique: {critique}\n\nDocs: {_docs_blob(s.get('docs', []))}"
+            res = await _cached_invoke(_PROMPTS["referee"], user)
+            refined = orjson.loads(res)
+        except Exception as e:
+            logging.warning(f"referee refinement skipped: {e}")
+        if refined is not None:
             try:
-                data = json.loads(res.content)
-            except Exception:
-                pass
-        except Exception:
-            pass
-    try:
-        Proposal.model_validate(data)
-    except ValidationError as e:
-        raise RuntimeError(f"invalid proposal: {e}")
-    # Must-cite: at least one evidence URL must be among collected docs
-    try:
-        docs = s.get("docs", [])
-        doc_urls = {d.get("url") for d in docs if d.get("url")}
-        ev_urls = {ev.get("url") for ev in (data.get("evidence") or []) if ev.get("url")}
-        if not (doc_urls & ev_urls):
-            raise RuntimeError("proposal lacks citations to retrieved docs")
-    except Exception:
+                proposal = Proposal.model_validate(refined)
+            except ValidationError as e:
+                raise RuntimeError(f"invalid proposal: {e}")
+    data = proposal.model_dump(mode="json")
+    data["consensus_score"] = consensus_score
+    # Must-cite: at least one evidence URL must be among collected docs.
+    # HttpUrl normalises bare hosts with a trailing slash, so compare without it.
+    docs = s.get("docs", [])
+    doc_urls = {str(d.get("url")).rstrip("/") for d in docs if d.get("url")}
+    ev_urls = {str(ev.url).rstrip("/") for ev in proposal.evidence}
+    if not (doc_urls & ev_urls):
         raise RuntimeError("proposal lacks citations to retrieved docs")
     if consensus_score < min_consensus:
         raise RuntimeError("consensus too low")
@@ -135,9 +197,11 @@ graph.add_node("proposer", node_proposer)
 graph.add_node("skeptic", node_skeptic)
 graph.add_node("referee", node_referee)
 graph.set_entry_point("reader")
+# Fan out: proposer and skeptic both only need the docs, so they run in the
+# same step and the referee waits for both.
 graph.add_edge("reader", "proposer")
-graph.add_edge("proposer", "skeptic")
-graph.add_edge("skeptic", "referee")
+graph.add_edge("reader", "skeptic")
+graph.add_edge(["proposer", "skeptic"], "referee")
 graph.add_edge("referee", END)
 compiled = graph.compile()
 
@@ -1,18 +1,46 @@
 import os, math
-import psycopg
-import httpx
-from apps.analytics.positions import update_position_prices, get_open_positions, get_portfolio_exposure
+import orjson
+from apps.analytics.positions import http_client, pool, update_position_prices
 
 PG_DSN = os.getenv("PG_DSN", "postgresql://trader:traderpw@db:5432/mastertrader")
 EXECUTOR_BASE = os.getenv("EXECUTOR_BASE", "http://executor:8001")
 
 
 def _price(symbol: str) -> float:
-    with httpx.Client(timeout=4.0) as c:
-        r = c.get(f"{EXECUTOR_BASE}/price", params={"symbol": symbol})
-        r.raise_for_status()
-        body = r.json()
-        return float(body["price"])
+    r = http_client().get("/price", params={"symbol": symbol})
+    r.raise_for_status()
+    return float(orjson.loads(r.content)["price"])
+
+
+# Latest equity snapshot, realized PnL since it, and open-book aggregates in one round-trip
+_SNAPSHOT_SQL = """
+    WITH e AS (
+        SELECT equity, high_water_mark, max_drawdown, ts
+        FROM equity_stats
+        ORDER BY ts DESC
+        LIMIT 1
+    ),
+    r AS (
+        SELECT COALESCE(SUM(realized_pnl), 0) AS realized_pnl, COALESCE(SUM(fees_paid), 0) AS fees_paid
+        FROM positions
+        WHERE closed_at IS NOT NULL
+        AND closed_at > (SELECT ts FROM e)
+    ),
+    u AS (
+        SELECT
+            COALESCE(SUM(unrealized_pnl), 0) AS unrealized_pnl,
+            COALESCE(SUM(fees_paid), 0) AS fees_paid,
+            COALESCE(SUM(quote_qty) FILTER (WHERE side = 'buy'), 0) AS long_exposure,
+            COALESCE(SUM(quote_qty) FILTER (WHERE side <> 'buy'), 0) AS short_exposure,
+            COUNT(DISTINCT symbol) AS symbols_count
+        FROM positions
+        WHERE closed_at IS NULL
+    )
+    SELECT e.equity, e.high_water_mark, e.max_drawdown,
+           r.realized_pnl, r.fees_paid,
+           u.unrealized_pnl, u.fees_paid, u.long_exposure, u.short_exposure, u.symbols_count
+    FROM r CROSS JOIN u LEFT JOIN e ON TRUE
+"""
 
 
 def update_equity(mark_only: bool = False):
@@ -20,34 +48,22 @@ def update_equity(mark_only: bool = False):
     Update equity including unrealized PnL from open positions.
     Now uses the comprehensive position tracking system.
     """
-    with psycopg.connect(PG_DSN) as conn:
-        cur = conn.execute("select equity, high_water_mark, max_drawdown from equity_stats order by ts desc limit 1")
-        row = cur.fetchone()
-        equity = float(row[0]) if row else 10000.0
-        hwm = float(row[1]) if row else equity
-        mdd = float(row[2]) if row else 0.0
-
-        # Update position prices and get unrealized PnL
-        if not mark_only:
-            update_position_prices(mark_only=False)
-        
-        # Get realized PnL from closed positions since last update
-        cur = conn.execute(
-            """
-            SELECT COALESCE(SUM(realized_pnl), 0), COALESCE(SUM(fees_paid), 0)
-            FROM positions
-            WHERE closed_at IS NOT NULL
-            AND closed_at > (SELECT MAX(ts) FROM equity_stats)
-            """
-        )
-        realized_row = cur.fetchone()
-        realized_pnl = float(realized_row[0]) if realized_row[0] else 0.0
-        fees_paid = float(realized_row[1]) if realized_row[1] else 0.0
+    # Update position prices and get unrealized PnL
+    if not mark_only:
+        update_position_prices(mark_only=False)
 
-        # Get unrealized PnL from open positions
-        open_positions = get_open_positions()
-        unrealized_pnl = sum(pos["unrealized_pnl"] for pos in open_positions)
-        total_fees = sum(pos["fees_paid"] for pos in open_positions)
+    with pool().connection() as conn:
+        row = conn.execute(_SNAPSHOT_SQL).fetchone()
+        equity = float(row[0]) if row[0] is not None else 10000.0
+        hwm = float(row[1]) if row[1] is not None else equity
+        mdd = float(row[2]) if row[2] is not None else 0.0
+        realized_pnl = float(row[3])
+        fees_paid = float(row[4])
+        unrealized_pnl = float(row[5])
+        total_fees = float(row[6])
+        long_exposure = float(row[7])
+        short_exposure = float(row[8])
+        symbols_count = int(row[9])
 
         # Calculate new equity
         # Equity = previous equity + realized PnL + unrealized PnL - fees
@@ -56,8 +72,17 @@ def update_equity(mark_only: bool = False):
         new_mdd = max(mdd, new_hwm - new_equity)
         romad = (new_equity - 0.0) / new_mdd if new_mdd > 1e-9 else float("inf")
 
-        # Get portfolio exposure
-        exposure = get_portfolio_exposure()
+        # Portfolio exposure against the equity just computed
+        total_exposure = long_exposure + short_exposure
+        leverage = total_exposure / new_equity if new_equity > 0 else 0.0
+        conn.execute(
+            """
+            INSERT INTO portfolio_exposure
+            (total_exposure, long_exposure, short_exposure, net_exposure, leverage, symbols_count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (total_exposure, long_exposure, short_exposure, long_exposure - short_exposure, leverage, symbols_count),
+        )
 
         conn.execute(
             "insert into equity_stats (equity, high_water_mark, max_drawdown, romad, notes) values (%s,%s,%s,%s,%s)",
@@ -66,7 +91,7 @@ def update_equity(mark_only: bool = False):
                 new_hwm,
                 new_mdd,
                 (romad if math.isfinite(romad) else None),
-                f"unrealized_pnl={unrealized_pnl:.2f} realized={realized_pnl:.2f} exposure={exposure.get('leverage', 0):.2f}x",
+                f"unrealized_pnl={unrealized_pnl:.2f} realized={realized_pnl:.2f} exposure={leverage:.2f}x",
             ),
         )
         conn.commit()
@@ -78,6 +103,5 @@ def update_equity(mark_only: bool = False):
             "unrealized_pnl": unrealized_pnl,
             "realized_pnl": realized_pnl,
             "total_fees": fees_paid + total_fees,
-            "leverage": exposure.get("leverage", 0.0),
+            "leverage": leverage,
         }
-
@@ -4,34 +4,110 @@ Tracks open positions, calculates PnL, and manages portfolio exposure.
 """
 
 import os
-import psycopg
+import time
+import asyncio
+from psycopg_pool import ConnectionPool
+import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 import httpx
+import orjson
 from apps.executor.utils.market_data import get_latest_close_http
+from libs.http import run as run_sync, shared_client
 
 
 PG_DSN = os.getenv("PG_DSN", "postgresql://trader:traderpw@db:5432/mastertrader")
 EXECUTOR_BASE = os.getenv("EXECUTOR_BASE", "http://executor:8001")
+EQUITY_MARK_TTL_S = float(os.getenv("EQUITY_MARK_TTL_S", "1.0"))
+PG_POOL_TIMEOUT_S = float(os.getenv("PG_POOL_TIMEOUT_S", "5"))
+
+# Shared by positions and equity; opened on first use so importing stays side-effect free.
+# prepare_threshold makes repeated statements server-side prepared.
+_POOL = ConnectionPool(
+    PG_DSN,
+    min_size=2,
+    max_size=10,
+    timeout=PG_POOL_TIMEOUT_S,
+    kwargs={"prepare_threshold": 5},
+    open=False,
+)
+
+
+def pool() -> ConnectionPool:
+    """The shared positions/equity connection pool, opened on first use."""
+    if _POOL.closed:
+        _POOL.open(wait=False)
+    return _POOL
+
+# Keep-alive client for executor price lookups; reused across calls
+_HTTP = httpx.Client(
+    base_url=EXECUTOR_BASE,
+    timeout=4.0,
+    limits=httpx.Limits(max_keepalive_connections=8),
+)
+
+
+def http_client() -> httpx.Client:
+    """The keep-alive executor client (base_url EXECUTOR_BASE) used for price lookups."""
+    return _HTTP
+
+# (equity, expires_at) of the last mark-only equity update
+_EQUITY_MARK: Tuple[float, float] = (0.0, 0.0)
+
+
+def _current_equity() -> float:
+    """Mark-to-market equity, reused for EQUITY_MARK_TTL_S seconds."""
+    global _EQUITY_MARK
+    equity, expires_at = _EQUITY_MARK
+    now = time.monotonic()
+    if now < expires_at:
+        return equity
+    from apps.analytics.equity import update_equity
+    equity = update_equity(mark_only=True).get("equity", 10000.0)
+    _EQUITY_MARK = (equity, now + EQUITY_MARK_TTL_S)
+    return equity
 
 
 def _get_price(symbol: str) -> float:
     """Get current market price for symbol."""
     try:
-        with httpx.Client(timeout=4.0) as c:
-            r = c.get(f"{EXECUTOR_BASE}/price", params={"symbol": symbol})
-            r.raise_for_status()
-            body = r.json()
-            return float(body["price"])
+        r = _HTTP.get("/price", params={"symbol": symbol})
+        r.raise_for_status()
+        return float(orjson.loads(r.content)["price"])
     except Exception:
         # Fallback to direct API call
-        import asyncio
         try:
-            return asyncio.run(get_latest_close_http(symbol, "1m"))
+            return run_sync(get_latest_close_http(symbol, "1m"))
         except Exception:
             return 0.0
 
 
+async def _prices(symbols: List[str]) -> Dict[str, float]:
+    """
+    Fetch current prices for many symbols concurrently over one client.
+
+    Returns:
+        Dict of symbol -> price (0.0 when no price could be fetched)
+    """
+    unique = list(dict.fromkeys(symbols))
+    c = shared_client()
+
+    async def one(symbol: str) -> float:
+        try:
+            r = await c.get(f"{EXECUTOR_BASE}/price", params={"symbol": symbol}, timeout=4.0)
+            r.raise_for_status()
+            return float(orjson.loads(r.content)["price"])
+        except Exception:
+            # Fallback to direct API call
+            try:
+                return await get_latest_close_http(symbol, "1m")
+            except Exception:
+                return 0.0
+
+    prices = await asyncio.gather(*(one(sym) for sym in unique))
+    return dict(zip(unique, prices))
+
+
 def open_position(
     symbol: str,
     side: str,
@@ -48,7 +124,7 @@ def open_position(
     Returns:
         Position ID
     """
-    with psycopg.connect(PG_DSN) as conn:
+    with pool().connection() as conn:
         cur = conn.execute(
             """
             INSERT INTO positions 
@@ -75,7 +151,7 @@ def close_position(
     Returns:
         True if successful
     """
-    with psycopg.connect(PG_DSN) as conn:
+    with pool().connection() as conn:
         conn.execute(
             """
             UPDATE positions
@@ -91,52 +167,84 @@ def close_position(
         return True
 
 
+def _open_symbols() -> List[str]:
+    # Unlocked read: no row lock or open transaction is held while pricing
+    with pool().connection() as conn:
+        symbols = [r[0] for r in conn.execute(
+            "SELECT DISTINCT symbol FROM positions WHERE closed_at IS NULL"
+        ).fetchall()]
+        conn.commit()
+    return symbols
+
+
 def update_position_prices(mark_only: bool = False) -> Dict[str, int]:
     """
     Update current prices and unrealized PnL for all open positions.
     
+    For sync callers; code already on an event loop uses
+    update_position_prices_async instead.
+    
     Returns:
         Dict with counts of updated positions
     """
-    with psycopg.connect(PG_DSN) as conn:
-        # Get all open positions
+    symbols = _open_symbols()
+    # One concurrent round of price fetches instead of a request per position
+    prices = run_sync(_prices(symbols)) if symbols else {}
+    return _mark_positions(prices)
+
+
+async def update_position_prices_async(mark_only: bool = False) -> Dict[str, int]:
+    """update_position_prices for async callers; DB work runs in a thread."""
+    symbols = await asyncio.to_thread(_open_symbols)
+    prices = await _prices(symbols) if symbols else {}
+    return await asyncio.to_thread(_mark_positions, prices)
+
+
+def _mark_positions(prices: Dict[str, float]) -> Dict[str, int]:
+    with pool().connection() as conn:
+        # Short transaction: lock the open positions this runner marks; rows held
+        # by a concurrent runner are skipped rather than re-marked, so runners can scale out.
         cur = conn.execute(
             """
-            SELECT id, symbol, side, base_qty, entry_price
+            SELECT id, symbol, CASE WHEN side = 'buy' THEN 1.0 ELSE -1.0 END AS sgn, base_qty, entry_price
             FROM positions
             WHERE closed_at IS NULL
+            FOR UPDATE SKIP LOCKED
             """
         )
-        positions = cur.fetchall()
+        # Positions opened after the symbol read have no price yet; leave them
+        # for the next mark rather than counting them as errors
+        positions = [p for p in cur.fetchall() if p[1] in prices]
+        n = len(positions)
         
-        updated = 0
-        errors = 0
+        # Vectorised PnL over the whole book: sign * (px - entry) * qty
+        current_px = np.fromiter((prices.get(p[1], 0.0) for p in positions), dtype=np.float64, count=n)
+        entry_px = np.fromiter((float(p[4]) for p in positions), dtype=np.float64, count=n)
+        qty = np.fromiter((float(p[3]) for p in positions), dtype=np.float64, count=n)
+        side_sign = np.fromiter((float(p[2]) for p in positions), dtype=np.float64, count=n)
+        unrealized_pnl = side_sign * (current_px - entry_px) * qty
+        priced = current_px != 0.0
         
-        for pos_id, symbol, side, base_qty, entry_price in positions:
-            try:
-                current_price = _get_price(symbol)
-                if current_price == 0.0:
-                    errors += 1
-                    continue
-                
-                # Calculate unrealized PnL
-                if side.lower() == "buy":
-                    unrealized_pnl = (current_price - float(entry_price)) * float(base_qty)
-                else:  # sell/short
-                    unrealized_pnl = (float(entry_price) - current_price) * float(base_qty)
-                
-                conn.execute(
-                    """
-                    UPDATE positions
-                    SET current_price = %s, unrealized_pnl = %s
-                    WHERE id = %s
-                    """,
-                    (current_price, unrealized_pnl, pos_id),
-                )
-                updated += 1
-            except Exception as e:
-                errors += 1
-                continue
+        rows = [
+            (p[0], float(cp), float(pnl))
+            for p, cp, pnl, ok in zip(positions, current_px, unrealized_pnl, priced)
+            if ok
+        ]
+        if rows:
+            # Single round-trip: unnest parallel arrays into a VALUES table
+            pids, cps, pnls = zip(*rows)
+            conn.execute(
+                """
+                UPDATE positions p
+                SET current_price = v.cp, unrealized_pnl = v.upnl
+                FROM unnest(%s::uuid[], %s::numeric[], %s::numeric[]) AS v(pid, cp, upnl)
+                WHERE p.id = v.pid
+                """,
+                (list(pids), list(cps), list(pnls)),
+                prepare=True,
+            )
+        updated = len(rows)
+        errors = n - updated
         
         conn.commit()
         
@@ -149,7 +257,7 @@ def update_position_prices(mark_only: bool = False) -> Dict[str, int]:
 
 def get_open_positions() -> List[Dict]:
     """Get all open positions with current PnL."""
-    with psycopg.connect(PG_DSN) as conn:
+    with pool().connection() as conn:
         cur = conn.execute(
             """
             SELECT 
@@ -182,36 +290,28 @@ def get_open_positions() -> List[Dict]:
         return positions
 
 
-def get_portfolio_exposure() -> Dict:
+def get_portfolio_exposure(current_equity: Optional[float] = None) -> Dict:
     """
     Calculate total portfolio exposure and risk metrics.
     
+    Args:
+        current_equity: Precomputed equity; marked fresh (or from the short TTL cache) when omitted
+    
     Returns:
         Dict with exposure metrics
     """
     positions = get_open_positions()
     
-    total_long_exposure = 0.0
-    total_short_exposure = 0.0
-    total_unrealized_pnl = 0.0
-    total_fees = 0.0
-    symbols = set()
+    quote_qty = np.fromiter((pos["quote_qty"] for pos in positions), dtype=np.float64, count=len(positions))
+    is_long = np.fromiter((pos["side"] == "buy" for pos in positions), dtype=bool, count=len(positions))
+    total_long_exposure = float(quote_qty[is_long].sum())
+    total_short_exposure = float(quote_qty[~is_long].sum())
+    total_unrealized_pnl = float(sum(pos["unrealized_pnl"] for pos in positions))
+    total_fees = float(sum(pos["fees_paid"] for pos in positions))
+    symbols = {pos["symbol"] for pos in positions}
     
-    for pos in positions:
-        symbols.add(pos["symbol"])
-        exposure = pos["quote_qty"]
-        total_unrealized_pnl += pos["unrealized_pnl"]
-        total_fees += pos["fees_paid"]
-        
-        if pos["side"].lower() == "buy":
-            total_long_exposure += exposure
-        else:
-            total_short_exposure += exposure
-    
-    # Get current equity
-    from apps.analytics.equity import update_equity
-    equity_data = update_equity(mark_only=True)
-    current_equity = equity_data.get("equity", 10000.0)
+    if current_equity is None:
+        current_equity = _current_equity()
     
     total_exposure = total_long_exposure + total_short_exposure
     net_exposure = total_long_exposure - total_short_exposure
@@ -220,7 +320,7 @@ def get_portfolio_exposure() -> Dict:
     leverage = total_exposure / current_equity if current_equity > 0 else 0.0
     
     # Store exposure snapshot
-    with psycopg.connect(PG_DSN) as conn:
+    with pool().connection() as conn:
         conn.execute(
             """
             INSERT INTO portfolio_exposure
@@ -252,6 +352,8 @@ def check_position_limits(
     quote_qty: float,
     max_position_size_pct: float = 20.0,
     max_portfolio_exposure_pct: float = 200.0,
+    current_equity: Optional[float] = None,
+    exposure: Optional[Dict] = None,
 ) -> Tuple[bool, Optional[str]]:
     """
     Check if new position would exceed limits.
@@ -262,13 +364,14 @@ def check_position_limits(
         quote_qty: Proposed position size
         max_position_size_pct: Max position as % of equity
         max_portfolio_exposure_pct: Max total exposure as % of equity
+        current_equity: Precomputed equity for this tick, to share across checks
+        exposure: Precomputed get_portfolio_exposure() result for this tick
     
     Returns:
         Tuple of (allowed, reason_if_denied)
     """
-    from apps.analytics.equity import update_equity
-    equity_data = update_equity(mark_only=True)
-    current_equity = equity_data.get("equity", 10000.0)
+    if current_equity is None:
+        current_equity = _current_equity()
     
     # Check individual position size
     position_pct = (quote_qty / current_equity) * 100 if current_equity > 0 else 0.0
@@ -276,7 +379,8 @@ def check_position_limits(
         return (False, f"Position size {position_pct:.2f}% exceeds limit {max_position_size_pct}%")
     
     # Check total portfolio exposure
-    exposure = get_portfolio_exposure()
+    if exposure is None:
+        exposure = get_portfolio_exposure(current_equity)
     new_total_exposure = exposure["total_exposure"] + quote_qty
     new_exposure_pct = (new_total_exposure / current_equity) * 100 if current_equity > 0 else 0.0
     
@@ -1,12 +1,20 @@
-import os, math, time
+import os, math, time, asyncio
 import httpx
+import numpy as np
+from functools import lru_cache
 from urllib.parse import urlparse
-from apps.rag.collector import collect as rag_collect
+from apps.rag.collector import collect_async as rag_collect
+from libs.http import shared_client
 
 
 # --- Hawkes-style burst proxy (online) ---
 # We maintain lightweight per-symbol state so intensity responds to recent arrivals.
-_STATE = {}  # symbol -> dict(lambda_ema, baseline_ema, last_ts)
+# Stored column-wise (one array per field, indexed via _IDX) so a tick over many
+# symbols updates in a handful of vector ops.
+_IDX: dict[str, int] = {}  # symbol -> row
+_LAM = np.zeros(0)         # lambda_ema
+_BASE = np.zeros(0)        # baseline_ema
+_TS = np.zeros(0)          # last_ts
 
 # Tuning (seconds)
 HAWKES_TAU_S = float(os.getenv("AAS_HAWKES_TAU", "120"))           # fast intensity horizon
@@ -14,16 +22,17 @@ BASELINE_TAU_S = float(os.getenv("AAS_BASELINE_TAU", "900"))       # slow baseli
 MIN_UNIQUE_SOURCES = int(os.getenv("AAS_MIN_UNIQUE_SOURCES", "2"))
 
 
-def _exp_decay_weight(dt_s: float, tau_s: float) -> float:
+def _exp_decay_weight(dt_s: np.ndarray, tau_s: float) -> np.ndarray:
     if tau_s <= 0:
-        return 0.0
-    return math.exp(-max(0.0, dt_s) / tau_s)
+        return np.zeros_like(dt_s)
+    return np.exp(-np.maximum(0.0, dt_s) / tau_s)
 
 
 def _now_s() -> float:
     return time.time()
 
 
+@lru_cache(maxsize=8192)
 def _source_domain(url: str) -> str:
     try:
         return urlparse(url).netloc or ""
@@ -31,29 +40,46 @@ def _source_domain(url: str) -> str:
         return ""
 
 
-def _update_hawkes(symbol: str, events_count: int, unique_sources: int) -> float:
+def _row(symbol: str, now: float) -> int:
+    global _LAM, _BASE, _TS
+    i = _IDX.get(symbol)
+    if i is None:
+        i = _IDX[symbol] = len(_IDX)
+        _LAM = np.append(_LAM, 0.0)
+        _BASE = np.append(_BASE, 0.0)
+        _TS = np.append(_TS, now)
+    return i
+
+
+def _update_hawkes_batch(symbols: list[str], arrivals) -> np.ndarray:
+    # symbols must be unique within a batch; returns burst (lambda/baseline) per symbol
     now = _now_s()
-    st = _STATE.get(symbol, {"lambda": 0.0, "baseline": 0.0, "ts": now})
-    dt = now - st["ts"]
+    idx = np.fromiter((_row(sym, now) for sym in symbols), dtype=np.intp, count=len(symbols))
+    # Convert events/min proxy -> per tick arrival weight
+    arr = np.asarray(arrivals, dtype=np.float64)
+    dt = now - _TS[idx]
     w_fast = _exp_decay_weight(dt, HAWKES_TAU_S)
     w_slow = _exp_decay_weight(dt, BASELINE_TAU_S)
-    # Convert events/min proxy -> per tick arrival weight
-    arrivals = float(events_count)
-    lam = st["lambda"] * w_fast + arrivals * (1 - w_fast)
-    base = st["baseline"] * w_slow + arrivals * (1 - w_slow)
-    _STATE[symbol] = {"lambda": lam, "baseline": base, "ts": now}
+    lam = _LAM[idx] * w_fast + arr * (1 - w_fast)
+    base = _BASE[idx] * w_slow + arr * (1 - w_slow)
+    _LAM[idx] = lam
+    _BASE[idx] = base
+    _TS[idx] = now
     # Burst score relative to baseline
-    denom = max(1e-6, base)
-    burst = lam / denom
+    return lam / np.maximum(1e-6, base)
+
+
+def _update_hawkes(symbol: str, events_count: int, unique_sources: int) -> float:
+    burst = float(_update_hawkes_batch([symbol], [events_count])[0])
     # Require minimum diversity of sources
     if unique_sources < MIN_UNIQUE_SOURCES:
         burst *= 0.5
     return burst
 
 
-def compute_attention(symbol: str) -> tuple[float, int]:
+async def compute_attention(symbol: str) -> tuple[float, int]:
     # Pull recent docs for symbol/thesis; count arrivals + source diversity
-    docs = rag_collect(symbol, 60)
+    docs = await rag_collect(symbol, 60)
     events = len(docs)
     unique_src = len({ _source_domain(d.get("url", "")) for d in docs if d.get("url") })
     burst = _update_hawkes(symbol, events, unique_src)
@@ -74,22 +100,34 @@ async def liquidity_friction(symbol: str, notional: float) -> tuple[float, dict]
         bases.append(fb)
     bases.append(os.getenv("BINANCE_BASE", "https://api.binance.com"))
     headers = {"User-Agent": "MasterTrader/1.0", "Accept": "application/json"}
+    c = shared_client()
+
+    async def fetch(base: str) -> dict:
+        r = await c.get(f"{base}/api/v3/depth?symbol={symbol}&limit=5", headers=headers)
+        # Treat 451/403/429 as hard failures to trigger fallback
+        if r.status_code in (451, 403, 429):
+            raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+        r.raise_for_status()
+        return r.json()
+
+    # Race all bases; first successful response wins, the rest are cancelled
+    tasks = [asyncio.create_task(fetch(b)) for b in bases]
+    pending = set(tasks)
     last_exc = None
     ob = None
-    async with httpx.AsyncClient(timeout=10, headers=headers) as c:
-        for base in bases:
-            try:
-                url = f"{base}/api/v3/depth?symbol={symbol}&limit=5"
-                r = await c.get(url)
-                # Treat 451/403/429 as hard failures to trigger fallback
-                if r.status_code in (451, 403, 429):
-                    raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
-                r.raise_for_status()
-                ob = r.json()
-                break
-            except Exception as e:
-                last_exc = e
-                continue
+    try:
+        while pending and ob is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in tasks:
+                if t not in done:
+                    continue
+                if t.exception() is None:
+                    ob = t.result()
+                    break
+                last_exc = t.exception()
+    finally:
+        for t in pending:
+            t.cancel()
     if ob is None:
         # surface the original exception
         raise last_exc or RuntimeError("failed to fetch order book")
@@ -111,7 +149,7 @@ async def liquidity_friction(symbol: str, notional: float) -> tuple[float, dict]
 
 
 async def aslf_score(symbol: str, notional: float) -> dict:
-    burst, uniq = compute_attention(symbol)
+    burst, uniq = await compute_attention(symbol)
     w = auth_weight(uniq)
     aas = burst * w
     # Try friction; if fails, deny by default
@@ -1,6 +1,6 @@
 """Backtesting framework for strategy validation."""
 
-from .framework import BacktestEngine, BacktestResult, Trade
+from .framework import BacktestEngine, BacktestResult, Strategy, Trade
 
-__all__ = ["BacktestEngine", "BacktestResult", "Trade"]
+__all__ = ["BacktestEngine", "BacktestResult", "Strategy", "Trade"]
 
@@ -0,0 +1,30 @@
+"""
+Ahead-of-time build of the backtest kernels.
+
+    python -m apps.backtest._aot
+
+writes a `backtest_kernel` extension module next to this file. When present,
+apps.backtest._kernel loads it instead of JIT-compiling, so fresh processes
+(walk-forward workers, CLI runs) skip the compile step entirely.
+"""
+
+import pathlib
+
+from numba.pycc import CC
+
+from apps.backtest._kernel import _simulate_jit, _max_drawdown_jit
+
+
+cc = CC("backtest_kernel")
+cc.output_dir = str(pathlib.Path(__file__).parent)
+
+cc.export(
+    "simulate",
+    "Tuple((f8[:], i8[:], i8[:], i1[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:]))"
+    "(f8[:], i1[:], f8[:], f8, f8, f8)",
+)(getattr(_simulate_jit, "py_func", _simulate_jit))
+cc.export("max_drawdown", "UniTuple(f8, 2)(f8[:])")(getattr(_max_drawdown_jit, "py_func", _max_drawdown_jit))
+
+
+if __name__ == "__main__":
+    cc.compile()
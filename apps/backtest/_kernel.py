@@ -0,0 +1,131 @@
+"""
+Compiled loops for the backtest engine: the single-symbol simulation behind
+BacktestEngine.run_signals (mirrors execute_trade/close_trade/update_equity on
+plain arrays) and the drawdown scan used by calculate_metrics.
+"""
+
+import numpy as np
+
+from libs.jit import njit
+
+
+@njit(cache=True)
+def _simulate(close, action, quote_qty, initial_capital, commission_rate, slippage_bps):
+    """
+    Simulate flip-on-signal trading over one symbol.
+
+    Args:
+        close: Close price per bar
+        action: Per-bar signal, 1 = buy, -1 = sell, 0 = hold
+        quote_qty: Per-bar order size in quote currency; NaN means 10% of capital
+        initial_capital: Starting cash
+        commission_rate: Taker fee rate applied to entry notional and exit proceeds
+        slippage_bps: Adverse slippage applied to every fill
+
+    Returns:
+        Tuple of (equity per bar, trade columns: entry_idx, exit_idx, side,
+        entry_price, exit_price, base_qty, quote_qty, fees, pnl), trade
+        columns sliced to the number of trades opened
+    """
+    n = close.shape[0]
+    slip = slippage_bps / 10000.0
+    equity = np.empty(n, dtype=np.float64)
+    t_entry = np.empty(n, dtype=np.int64)
+    t_exit = np.empty(n, dtype=np.int64)
+    t_side = np.empty(n, dtype=np.int8)
+    t_entry_px = np.empty(n, dtype=np.float64)
+    t_exit_px = np.empty(n, dtype=np.float64)
+    t_base = np.empty(n, dtype=np.float64)
+    t_quote = np.empty(n, dtype=np.float64)
+    t_fees = np.empty(n, dtype=np.float64)
+    t_pnl = np.empty(n, dtype=np.float64)
+
+    capital = initial_capital
+    m = 0
+    open_j = -1
+    for i in range(n):
+        a = action[i]
+        if a != 0:
+            q = quote_qty[i]
+            if np.isnan(q):
+                q = capital * 0.1
+            price = close[i]
+            # Flip: close the open position first
+            if open_j >= 0:
+                fill = price * (1.0 - slip) if t_side[open_j] > 0 else price * (1.0 + slip)
+                proceeds = fill * t_base[open_j]
+                exit_fees = proceeds * commission_rate
+                net = proceeds - exit_fees
+                t_exit[open_j] = i
+                t_exit_px[open_j] = fill
+                t_pnl[open_j] = net - (t_quote[open_j] + t_fees[open_j])
+                t_fees[open_j] += exit_fees
+                capital += net
+                open_j = -1
+            fill = price * (1.0 + slip) if a > 0 else price * (1.0 - slip)
+            fees = q * commission_rate
+            if q + fees <= capital:
+                t_entry[m] = i
+                t_exit[m] = -1
+                t_side[m] = a
+                t_entry_px[m] = fill
+                t_base[m] = q / fill
+                t_quote[m] = q
+                t_fees[m] = fees
+                t_pnl[m] = 0.0
+                capital -= q + fees
+                open_j = m
+                m += 1
+        equity[i] = capital + (t_quote[open_j] if open_j >= 0 else 0.0)
+
+    # Close any open position on the last bar
+    if open_j >= 0:
+        fill = close[n - 1] * (1.0 - slip) if t_side[open_j] > 0 else close[n - 1] * (1.0 + slip)
+        proceeds = fill * t_base[open_j]
+        exit_fees = proceeds * commission_rate
+        net = proceeds - exit_fees
+        t_exit[open_j] = n - 1
+        t_exit_px[open_j] = fill
+        t_pnl[open_j] = net - (t_quote[open_j] + t_fees[open_j])
+        t_fees[open_j] += exit_fees
+
+    return (
+        equity,
+        t_entry[:m],
+        t_exit[:m],
+        t_side[:m],
+        t_entry_px[:m],
+        t_exit_px[:m],
+        t_base[:m],
+        t_quote[:m],
+        t_fees[:m],
+        t_pnl[:m],
+    )
+
+
+@njit(cache=True)
+def _max_drawdown(equity):
+    """
+    Single pass over an equity curve.
+
+    Returns:
+        Tuple of (max drawdown as a non-positive amount, overall peak equity)
+    """
+    peak = equity[0]
+    mdd = 0.0
+    for i in range(1, equity.shape[0]):
+        x = equity[i]
+        if x > peak:
+            peak = x
+        dd = x - peak
+        if dd < mdd:
+            mdd = dd
+    return mdd, peak
+
+
+# Prefer the ahead-of-time build (see _aot.py) when it has been compiled
+_simulate_jit, _max_drawdown_jit = _simulate, _max_drawdown
+try:
+    from apps.backtest.backtest_kernel import simulate as _simulate, max_drawdown as _max_drawdown
+except ImportError:
+    pass
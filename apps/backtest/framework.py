@@ -5,16 +5,91 @@ Supports walk-forward analysis, Monte Carlo simulation, and performance metrics.
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Callable, Tuple
+from typing import Dict, List, Optional, Callable, Tuple, Protocol, Union, runtime_checkable
 from datetime import datetime, timedelta
 import asyncio
 import httpx
+import orjson
+from collections import namedtuple
 from dataclasses import dataclass
-from apps.executor.utils.fees import calculate_fees, estimate_slippage_from_orderbook
+from functools import lru_cache
+from apps.executor.utils.fees import estimate_slippage_from_orderbook
 from apps.risk.metrics import compute_fractional_kelly
+from apps.backtest._kernel import _simulate, _max_drawdown
 
 
-@dataclass
+def _fetch_klines(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> tuple:
+    """
+    Fetch raw klines from Binance.
+    
+    Returns:
+        Tuple of kline rows as returned by the API
+    """
+    params = {
+        "symbol": symbol,
+        "interval": interval,
+        "limit": limit,
+    }
+    if start_ms is not None:
+        params["startTime"] = start_ms
+    if end_ms is not None:
+        params["endTime"] = end_ms
+    
+    with httpx.Client(timeout=30) as client:
+        r = client.get("https://api.binance.com/api/v3/klines", params=params)
+        r.raise_for_status()
+        return tuple(tuple(row) for row in orjson.loads(r.content))
+
+
+# Walk-forward and Monte Carlo runs re-load the same window repeatedly, so
+# identical bounded requests are served from memory. Failed fetches are not cached.
+_fetch_klines_window = lru_cache(maxsize=128)(_fetch_klines)
+
+
+def _fetch_klines_raw(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> tuple:
+    """
+    Fetch raw klines, memoized only for bounded windows.
+    
+    An open-ended request means "the most recent bars", which moves with time,
+    so it always goes to the API.
+    """
+    if start_ms is not None and end_ms is not None:
+        return _fetch_klines_window(symbol, interval, limit, start_ms, end_ms)
+    return _fetch_klines(symbol, interval, limit, start_ms, end_ms)
+
+
+def _bar_type(columns: List[str]) -> type:
+    """
+    Row type for legacy strategies: a namedtuple over the bar's columns that
+    also takes column-name keys, so both row.close and row["close"] work.
+    """
+    index = {c: i for i, c in enumerate(columns)}
+
+    class Bar(namedtuple("Bar", columns, rename=True)):
+        __slots__ = ()
+
+        def __getitem__(self, key):
+            return tuple.__getitem__(self, index[key] if isinstance(key, str) else key)
+
+        def get(self, key, default=None):
+            return tuple.__getitem__(self, index[key]) if key in index else default
+
+    return Bar
+
+
+@dataclass(slots=True)
 class Trade:
     """Represents a single trade."""
     symbol: str
@@ -32,7 +107,7 @@ class Trade:
     status: str  # 'open', 'closed', 'stopped'
 
 
-@dataclass
+@dataclass(slots=True)
 class BacktestResult:
     """Backtest results and metrics."""
     total_return: float
@@ -56,6 +131,21 @@ class BacktestResult:
     daily_returns: pd.Series
 
 
+@runtime_checkable
+class Strategy(Protocol):
+    """
+    Vectorized strategy: computes every bar's signal in one pass over the data,
+    so indicators are not recomputed per bar.
+    
+    signals(data) returns a DataFrame aligned with data with an "action" column
+    ("buy"/"sell"/"hold") and an optional "quote_qty" column (NaN means the
+    default 10% of capital). An optional `symbol` attribute names the traded pair.
+    """
+    
+    def signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        ...
+
+
 class BacktestEngine:
     """
     Backtesting engine for strategy validation.
@@ -76,7 +166,10 @@ class BacktestEngine:
         self.end_date = end_date
         
         self.capital = initial_capital
-        self.equity_curve = []
+        # Equity curve as parallel preallocated arrays filled up to _equity_i
+        self._equity_val = np.empty(0, dtype=np.float64)
+        self._equity_ts = np.empty(0, dtype=np.int64)  # ns since epoch
+        self._equity_i = 0
         self.trades: List[Trade] = []
         self.open_positions: Dict[str, Trade] = {}
         self.daily_returns = []
@@ -98,39 +191,28 @@ class BacktestEngine:
         Returns:
             DataFrame with OHLCV data
         """
-        base_url = "https://api.binance.com/api/v3/klines"
-        
-        # Calculate start time if needed
-        params = {
-            "symbol": symbol,
-            "interval": interval,
-            "limit": limit,
-        }
-        
-        if self.start_date:
-            params["startTime"] = int(self.start_date.timestamp() * 1000)
-        if self.end_date:
-            params["endTime"] = int(self.end_date.timestamp() * 1000)
+        start_ms = int(self.start_date.timestamp() * 1000) if self.start_date else None
+        end_ms = int(self.end_date.timestamp() * 1000) if self.end_date else None
         
         try:
-            with httpx.Client(timeout=30) as client:
-                r = client.get(base_url, params=params)
-                r.raise_for_status()
-                data = r.json()
-            
-            df = pd.DataFrame(data, columns=[
-                "open_time", "open", "high", "low", "close", "volume",
-                "close_time", "quote_volume", "trades", "taker_buy_base",
-                "taker_buy_quote", "ignore"
-            ])
-            
-            # Convert to proper types
-            df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-            df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
-            for col in ["open", "high", "low", "close", "volume", "quote_volume"]:
-                df[col] = df[col].astype(float)
+            data = _fetch_klines_raw(symbol, interval, limit, start_ms, end_ms)
             
-            return df[["open_time", "open", "high", "low", "close", "volume", "quote_volume"]]
+            # Slice the numeric columns out of the raw rows and cast them in one pass
+            # kline schema: [open time, open, high, low, close, volume, close time, quote volume, ...]
+            columns = ["open_time", "open", "high", "low", "close", "volume", "quote_volume"]
+            if not data:
+                return pd.DataFrame(columns=columns)
+            arr = np.array(data, dtype=object)
+            floats = arr[:, [1, 2, 3, 4, 5, 7]].astype(np.float64)
+            return pd.DataFrame({
+                "open_time": pd.to_datetime(arr[:, 0].astype(np.int64), unit="ms"),
+                "open": floats[:, 0],
+                "high": floats[:, 1],
+                "low": floats[:, 2],
+                "close": floats[:, 3],
+                "volume": floats[:, 4],
+                "quote_volume": floats[:, 5],
+            }, columns=columns)
         except Exception as e:
             print(f"Error loading data: {e}")
             return pd.DataFrame()
@@ -162,7 +244,8 @@ class BacktestEngine:
         base_qty = quote_qty / fill_price
         
         # Calculate fees
-        fees = calculate_fees("binance", side, quote_qty, is_maker=False)
+        # Flat taker rate from the engine (binance taker by default)
+        fees = quote_qty * self.commission_rate
         
         # Check if we have enough capital
         total_cost = quote_qty + fees
@@ -226,7 +309,7 @@ class BacktestEngine:
         proceeds = fill_price * trade.base_qty
         
         # Calculate fees
-        exit_fees = calculate_fees("binance", "sell" if trade.side == "buy" else "buy", proceeds, is_maker=False)
+        exit_fees = proceeds * self.commission_rate
         
         # Calculate PnL
         net_proceeds = proceeds - exit_fees
@@ -250,8 +333,14 @@ class BacktestEngine:
         
         return trade
     
-    def update_equity(self, timestamp: datetime):
-        """Update equity curve with current positions."""
+    def _reset_equity(self, n: int):
+        """Allocate the equity buffers for an n-bar run."""
+        self._equity_val = np.empty(n, dtype=np.float64)
+        self._equity_ts = np.empty(n, dtype=np.int64)
+        self._equity_i = 0
+    
+    def update_equity(self, timestamp: Union[datetime, int]):
+        """Update equity curve with current positions (timestamp as datetime or int ns since epoch)."""
         equity = self.capital
         
         # Add unrealized PnL from open positions
@@ -259,32 +348,59 @@ class BacktestEngine:
             # Use entry price as proxy (in real backtest, would use current price)
             equity += trade.quote_qty
         
-        self.equity_curve.append({
-            "timestamp": timestamp,
-            "equity": equity,
-        })
+        i = self._equity_i
+        if i == len(self._equity_val):
+            # Grow when called beyond the size run() allocated
+            grow = max(64, i)
+            self._equity_val = np.concatenate([self._equity_val, np.empty(grow, dtype=np.float64)])
+            self._equity_ts = np.concatenate([self._equity_ts, np.empty(grow, dtype=np.int64)])
+        self._equity_val[i] = equity
+        self._equity_ts[i] = timestamp if isinstance(timestamp, (int, np.integer)) else pd.Timestamp(timestamp).value
+        self._equity_i = i + 1
     
     def run(
         self,
         data: pd.DataFrame,
-        strategy: Callable,
+        strategy: Union[Strategy, Callable],
     ) -> BacktestResult:
         """
         Run backtest on historical data.
         
         Args:
             data: Historical OHLCV data
-            strategy: Strategy function that takes (row, engine) and returns signal dict
+            strategy: A Strategy (preferred; signals computed once and simulated by
+                     the compiled kernel), or a legacy function that takes (row, engine)
+                     and returns signal dict
+                     row is the current bar; read columns as row["close"] or row.close
                      Signal dict: {"action": "buy"/"sell"/"hold", "quote_qty": float, "confidence": float}
         """
+        if isinstance(strategy, Strategy):
+            sig = strategy.signals(data)
+            action = sig["action"].to_numpy()
+            actions = np.where(action == "buy", 1, np.where(action == "sell", -1, 0))
+            quote_qty = sig["quote_qty"].to_numpy(dtype=np.float64) if "quote_qty" in sig else None
+            return self.run_signals(data, actions, quote_qty, symbol=getattr(strategy, "symbol", "BTCUSDT"))
+        
         self.capital = self.initial_capital
         self.trades = []
         self.open_positions = {}
-        self.equity_curve = []
         
-        for idx, row in data.iterrows():
-            timestamp = row["open_time"]
-            price = row["close"]
+        # Legacy row-wise path. Bars come from itertuples(name=None) -- plain
+        # tuples, no per-row Series -- wrapped in a namedtuple type keyed by the
+        # column names, so any column order works as long as open_time and
+        # close are present.
+        n = len(data)
+        self._reset_equity(n)
+        columns = list(data.columns)
+        t_col = columns.index("open_time")
+        bar = _bar_type(columns)._make
+        close = data["close"].to_numpy(dtype=np.float64)
+        ts_ns = data["open_time"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        
+        for i, values in enumerate(data.itertuples(index=False, name=None)):
+            timestamp = values[t_col]
+            price = float(close[i])
+            row = bar(values)
             
             # Get strategy signal
             signal = strategy(row, self)
@@ -303,13 +419,73 @@ class BacktestEngine:
                 self.execute_trade(symbol, side, quote_qty, price, timestamp)
             
             # Update equity
-            self.update_equity(timestamp)
+            self.update_equity(int(ts_ns[i]))
         
         # Close all open positions at end
-        final_price = data.iloc[-1]["close"]
-        final_timestamp = data.iloc[-1]["open_time"]
-        for symbol in list(self.open_positions.keys()):
-            self.close_trade(symbol, final_price, final_timestamp)
+        if n:
+            final_price = float(close[-1])
+            final_timestamp = data["open_time"].iloc[-1]
+            for symbol in list(self.open_positions.keys()):
+                self.close_trade(symbol, final_price, final_timestamp)
+        
+        return self.calculate_metrics()
+    
+    def run_signals(
+        self,
+        data: pd.DataFrame,
+        actions: np.ndarray,
+        quote_qty: Optional[np.ndarray] = None,
+        symbol: str = "BTCUSDT",
+    ) -> BacktestResult:
+        """
+        Run a backtest from precomputed per-bar signals using the compiled kernel.
+        
+        Same fill, fee and flip semantics as the row-wise path of run().
+        
+        Args:
+            data: Historical OHLCV data
+            actions: Per-bar signal, 1 = buy, -1 = sell, 0 = hold
+            quote_qty: Per-bar order size in quote currency; NaN (or None for all bars)
+                       means 10% of capital at signal time
+            symbol: Symbol recorded on the trades
+        """
+        n = len(data)
+        close = data["close"].to_numpy(dtype=np.float64)
+        actions = np.asarray(actions, dtype=np.int8)
+        if quote_qty is None:
+            quote_qty = np.full(n, np.nan)
+        quote_qty = np.asarray(quote_qty, dtype=np.float64)
+        
+        equity, entry_i, exit_i, side, entry_px, exit_px, base, quote, fees, pnl = _simulate(
+            close, actions, quote_qty, self.initial_capital, self.commission_rate, self.slippage_bps
+        )
+        
+        # Materialise Trade objects only for the trades taken, not per bar
+        # Timestamps stay int64 ns; only the trade endpoints become Timestamps
+        ts_ns = data["open_time"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        self.trades = [
+            Trade(
+                symbol=symbol,
+                side="buy" if side[j] > 0 else "sell",
+                entry_time=pd.Timestamp(ts_ns[entry_i[j]]),
+                exit_time=pd.Timestamp(ts_ns[exit_i[j]]),
+                entry_price=float(entry_px[j]),
+                exit_price=float(exit_px[j]),
+                base_qty=float(base[j]),
+                quote_qty=float(quote[j]),
+                fees=float(fees[j]),
+                slippage_bps=self.slippage_bps,
+                pnl=float(pnl[j]),
+                pnl_pct=float(pnl[j] / (quote[j] * (1 + self.commission_rate)) * 100),
+                status="closed",
+            )
+            for j in range(len(entry_i))
+        ]
+        self.open_positions = {}
+        self.capital = self.initial_capital + float(pnl.sum())
+        self._equity_val = equity
+        self._equity_ts = ts_ns
+        self._equity_i = n
         
         return self.calculate_metrics()
     
@@ -339,54 +515,64 @@ class BacktestEngine:
             )
         
         # Calculate returns
-        equity_df = pd.DataFrame(self.equity_curve)
-        if len(equity_df) == 0:
-            equity_df = pd.DataFrame({"timestamp": [datetime.now()], "equity": [self.initial_capital]})
-        
-        equity_df.set_index("timestamp", inplace=True)
-        equity_series = equity_df["equity"]
+        i = self._equity_i
+        if i == 0:
+            equity_series = pd.Series(
+                [self.initial_capital], index=pd.DatetimeIndex([datetime.now()], name="timestamp"), name="equity"
+            )
+        else:
+            equity_series = pd.Series(
+                self._equity_val[:i], index=pd.DatetimeIndex(self._equity_ts[:i].view("datetime64[ns]"), name="timestamp"), name="equity"
+            )
         
-        # Calculate daily returns
-        daily_returns = equity_series.pct_change().dropna()
+        # Per-bar returns straight off the equity array (pandas only for the result)
+        eq = equity_series.to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rets = np.diff(eq) / eq[:-1]
+        keep = ~np.isnan(rets)
+        rets = rets[keep]
+        daily_returns = pd.Series(rets, index=equity_series.index[1:][keep], name="equity")
         
         # Total return
-        final_equity = equity_series.iloc[-1] if len(equity_series) > 0 else self.initial_capital
+        final_equity = eq[-1]
         total_return = final_equity - self.initial_capital
         total_return_pct = (total_return / self.initial_capital) * 100
         
-        # Sharpe ratio (annualized, assuming daily returns)
-        if len(daily_returns) > 0 and daily_returns.std() > 0:
-            sharpe_ratio = (daily_returns.mean() / daily_returns.std()) * np.sqrt(365 * 24 * 60)  # Annualized for 1m data
+        # Sharpe ratio (annualized, assuming daily returns); sample std as pandas does
+        mean_r = rets.mean() if rets.size else 0.0
+        std_r = rets.std(ddof=1) if rets.size > 1 else 0.0
+        if std_r > 0:
+            sharpe_ratio = (mean_r / std_r) * np.sqrt(365 * 24 * 60)  # Annualized for 1m data
         else:
             sharpe_ratio = 0.0
         
         # Sortino ratio (downside deviation)
-        downside_returns = daily_returns[daily_returns < 0]
-        if len(downside_returns) > 0 and downside_returns.std() > 0:
-            sortino_ratio = (daily_returns.mean() / downside_returns.std()) * np.sqrt(365 * 24 * 60)
+        downside = rets[rets < 0]
+        downside_std = downside.std(ddof=1) if downside.size > 1 else 0.0
+        if downside_std > 0:
+            sortino_ratio = (mean_r / downside_std) * np.sqrt(365 * 24 * 60)
         else:
             sortino_ratio = 0.0
         
         # Max drawdown
-        running_max = equity_series.expanding().max()
-        drawdown = equity_series - running_max
-        max_drawdown = drawdown.min()
-        max_drawdown_pct = (max_drawdown / running_max.max()) * 100 if running_max.max() > 0 else 0.0
+        max_drawdown, peak = _max_drawdown(eq)
+        max_drawdown_pct = (max_drawdown / peak) * 100 if peak > 0 else 0.0
         
-        # Trade statistics
+        # Trade statistics from one PnL array
         closed_trades = [t for t in self.trades if t.status == "closed"]
-        winning_trades = [t for t in closed_trades if t.pnl > 0]
-        losing_trades = [t for t in closed_trades if t.pnl < 0]
+        pnl = np.fromiter((t.pnl for t in closed_trades), dtype=np.float64, count=len(closed_trades))
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
         
-        win_rate = len(winning_trades) / len(closed_trades) if closed_trades else 0.0
+        win_rate = wins.size / pnl.size if pnl.size else 0.0
         
-        avg_win = np.mean([t.pnl for t in winning_trades]) if winning_trades else 0.0
-        avg_loss = np.mean([abs(t.pnl) for t in losing_trades]) if losing_trades else 0.0
+        avg_win = float(wins.mean()) if wins.size else 0.0
+        avg_loss = float(-losses.mean()) if losses.size else 0.0
         
-        profit_factor = (avg_win * len(winning_trades)) / (avg_loss * len(losing_trades)) if avg_loss > 0 and losing_trades else float("inf") if winning_trades else 0.0
+        profit_factor = float(wins.sum() / -losses.sum()) if losses.size else float("inf") if wins.size else 0.0
         
-        largest_win = max([t.pnl for t in winning_trades]) if winning_trades else 0.0
-        largest_loss = min([t.pnl for t in losing_trades]) if losing_trades else 0.0
+        largest_win = float(wins.max()) if wins.size else 0.0
+        largest_loss = float(losses.min()) if losses.size else 0.0
         
         # Calmar ratio (annual return / max drawdown)
         annual_return = total_return_pct  # Simplified
@@ -402,8 +588,8 @@ class BacktestEngine:
             win_rate=win_rate,
             profit_factor=profit_factor,
             total_trades=len(closed_trades),
-            winning_trades=len(winning_trades),
-            losing_trades=len(losing_trades),
+            winning_trades=int(wins.size),
+            losing_trades=int(losses.size),
             avg_win=avg_win,
             avg_loss=avg_loss,
             largest_win=largest_win,
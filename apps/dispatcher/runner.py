@@ -59,9 +59,12 @@ async def main():
         backoff = ASLF_POLL_S
         while True:
             any_success = False
-            for sym in SYMBOLS:
+            # Score all symbols concurrently; submissions stay per symbol
+            results = await asyncio.gather(*(fetch_aslf(client, sym) for sym in SYMBOLS), return_exceptions=True)
+            for sym, aslf in zip(SYMBOLS, results):
                 try:
-                    aslf = await fetch_aslf(client, sym)
+                    if isinstance(aslf, Exception):
+                        raise aslf
                     decision = aslf.get("decision")
                     if decision == "allow":
                         res = await submit_proposal(client, sym)
@@ -1,15 +1,23 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import os, time, hmac, hashlib, httpx
-from .utils.market_data import get_latest_close_http, get_latest_close_replay, compute_simulated_fill
+import os, time, hmac, hashlib
+import orjson
+from urllib.parse import urlencode
+from .utils.market_data import get_latest_close_http, get_latest_close_replay, compute_simulated_fill, CLOSE_CACHE_STATS
 from .utils.paper_trading import execute_paper_trade
 from .utils.routing import route_order
-from .utils.fees import calculate_fees
+from .utils.fees import calculate_fees, BOOK_CACHE_STATS
+from libs.http import shared_client, aclose_shared_client
 
 
 app = FastAPI()
 
 
+@app.on_event("shutdown")
+async def _close_http():
+    await aclose_shared_client()
+
+
 class OrderReq(BaseModel):
     symbol: str
     side: str           # buy|sell
@@ -23,6 +31,11 @@ def status():
     return {"ok": True}
 
 
+@app.get("/metrics")
+def metrics():
+    return {"orderbook_cache": BOOK_CACHE_STATS, "close_cache": CLOSE_CACHE_STATS}
+
+
 @app.get("/price")
 async def price(symbol: str, interval: str = "1m"):
     # Public market data endpoint (no auth)
@@ -79,6 +92,17 @@ async def orders(req: OrderReq):
     raise HTTPException(400, "unknown venue")
 
 
+# (secret, keyed HMAC) -- the ipad/opad key schedule is done once and copied per order
+_HMAC_TMPL = None
+
+
+def _signer(secret: bytes):
+    global _HMAC_TMPL
+    if _HMAC_TMPL is None or _HMAC_TMPL[0] != secret:
+        _HMAC_TMPL = (secret, hmac.new(secret, digestmod=hashlib.sha256))
+    return _HMAC_TMPL[1].copy()
+
+
 async def place_binance(req: OrderReq):
     base = os.getenv("BINANCE_BASE", "https://testnet.binance.vision")
     api_key = os.getenv("BINANCE_API_KEY")
@@ -86,15 +110,19 @@ async def place_binance(req: OrderReq):
     if not api_key or not secret:
         raise HTTPException(500, "Missing BINANCE_API_KEY/SECRET")
     ts = int(time.time() * 1000)
-    params = (
-        f"symbol={req.symbol}&side={'BUY' if req.side=='buy' else 'SELL'}"
-        f"&type=MARKET&quoteOrderQty={req.quote_qty}&timestamp={ts}"
-    )
-    sig = hmac.new(secret, params.encode(), hashlib.sha256).hexdigest()
-    url = f"{base}/api/v3/order?{params}&signature={sig}"
+    params = urlencode({
+        "symbol": req.symbol,
+        "side": "BUY" if req.side == "buy" else "SELL",
+        "type": "MARKET",
+        "quoteOrderQty": req.quote_qty,
+        "timestamp": ts,
+    })
+    # Sign the encoded query once; the same string goes on the URL
+    h = _signer(secret)
+    h.update(params.encode("ascii"))
+    url = f"{base}/api/v3/order?{params}&signature={h.hexdigest()}"
     headers = {"X-MBX-APIKEY": api_key}
-    async with httpx.AsyncClient(timeout=15) as c:
-        r = await c.post(url, headers=headers)
-    return {"status": r.status_code, "body": r.json()}
+    r = await shared_client().post(url, headers=headers, timeout=15)
+    return {"status": r.status_code, "body": orjson.loads(r.content)}
 
 
@@ -1,5 +1,6 @@
 import math
 import os
+import numpy as np
 
 
 def estimate_slippage_bps(spread_bps: float, depth_ratio: float, notional: float, volatility: float = 0.02) -> float:
@@ -32,6 +33,23 @@ def estimate_slippage_bps(spread_bps: float, depth_ratio: float, notional: float
     return max(0.0, float(total_impact))
 
 
+def estimate_slippage_bps_vec(spread_bps, depth_ratio, notional, volatility=0.02) -> np.ndarray:
+    """
+    Array version of estimate_slippage_bps for grid evaluation (e.g. walk-forward sweeps).
+    
+    Args:
+        spread_bps, depth_ratio, notional, volatility: Scalars or arrays, broadcast together
+    
+    Returns:
+        Estimated slippage in basis points, one per broadcast element
+    """
+    spread_cost = np.asarray(spread_bps, dtype=np.float64) / 2
+    depth_term = 100 / np.maximum(1.0, depth_ratio)
+    vol_adjustment = np.asarray(volatility, dtype=np.float64) * 10000 * 0.5
+    size_impact = np.log10(np.maximum(1.0, np.asarray(notional, dtype=np.float64) / 1000)) * 2
+    return np.maximum(0.0, spread_cost + depth_term + vol_adjustment + size_impact)
+
+
 def calculate_optimal_slices(notional: float, volatility: float, depth_ratio: float, target_impact_bps: float = 10.0) -> int:
     """
     Calculate optimal number of slices for TWAP/VWAP execution.
@@ -61,6 +79,20 @@ def calculate_optimal_slices(notional: float, volatility: float, depth_ratio: fl
     return min(max(1, slices), 20)
 
 
+def calculate_optimal_slices_vec(notional, volatility, depth_ratio, target_impact_bps=10.0) -> np.ndarray:
+    """
+    Array version of calculate_optimal_slices.
+    
+    Returns:
+        Optimal number of slices (int64), one per broadcast element
+    """
+    full_impact = estimate_slippage_bps_vec(5.0, depth_ratio, notional, volatility)
+    vol_multiplier = np.maximum(1.0, np.asarray(volatility, dtype=np.float64) * 50)
+    slices = np.ceil((full_impact / target_impact_bps) * vol_multiplier)
+    slices = np.minimum(np.maximum(1, slices), 20).astype(np.int64)
+    return np.where(full_impact <= target_impact_bps, 1, slices)
+
+
 def choose_strategy(
     spread_bps: float,
     depth_ratio: float,
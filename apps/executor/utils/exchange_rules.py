@@ -1,6 +1,21 @@
-import os, httpx
+import os
+import orjson
+from libs.http import shared_client
 
-_CACHE = {"exchangeInfo": None}
+_CACHE = {"exchangeInfo": None, "by_symbol": {}}
+
+
+def _extract_filters(symbol_info: dict) -> dict:
+    # Pull the filters validate_order_filters needs out of the filters list once
+    out = {"MIN_NOTIONAL": None, "LOT_SIZE_step": None, "LOT_SIZE_inv": None}
+    for f in symbol_info.get("filters", []):
+        if f.get("filterType") == "MIN_NOTIONAL":
+            out["MIN_NOTIONAL"] = float(f.get("minNotional", 0))
+        if f.get("filterType") == "LOT_SIZE":
+            out["LOT_SIZE_step"] = float(f.get("stepSize", 0))
+    if out["LOT_SIZE_step"]:
+        out["LOT_SIZE_inv"] = 1.0 / out["LOT_SIZE_step"]
+    return out
 
 
 async def get_exchange_info():
@@ -8,15 +23,26 @@ async def get_exchange_info():
         return _CACHE["exchangeInfo"]
     base = os.getenv("BINANCE_BASE", "https://api.binance.com")
     url = f"{base}/api/v3/exchangeInfo"
-    async with httpx.AsyncClient(timeout=15) as c:
-        r = await c.get(url)
-        r.raise_for_status()
-        data = r.json()
+    r = await shared_client().get(url, timeout=15)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    # Index symbols once (exchangeInfo lists thousands) and pre-parse their filters
+    by_symbol = {}
+    for s in data.get("symbols", []):
+        s["_filters"] = _extract_filters(s)
+        by_symbol[s.get("symbol")] = s
+    _CACHE["by_symbol"] = by_symbol
     _CACHE["exchangeInfo"] = data
     return data
 
 
+def symbol_info_fast(symbol):
+    return _CACHE["by_symbol"].get(symbol)
+
+
 def _symbol_info(data, symbol):
+    if data is _CACHE["exchangeInfo"]:
+        return _CACHE["by_symbol"].get(symbol)
     for s in data.get("symbols", []):
         if s.get("symbol") == symbol:
             return s
@@ -24,22 +50,16 @@ def _symbol_info(data, symbol):
 
 
 def validate_order_filters(symbol_info: dict, price: float, quote_qty: float) -> tuple[bool, str | None]:
-    notional = price * (quote_qty / price)  # equals quote_qty
-    min_notional = None
-    step_size = None
-    for f in symbol_info.get("filters", []):
-        if f.get("filterType") == "MIN_NOTIONAL":
-            min_notional = float(f.get("minNotional", 0))
-        if f.get("filterType") == "LOT_SIZE":
-            step_size = float(f.get("stepSize", 0))
+    filters = symbol_info.get("_filters") or _extract_filters(symbol_info)
+    min_notional = filters["MIN_NOTIONAL"]
+    step_inv = filters["LOT_SIZE_inv"]
     if min_notional is not None and quote_qty < min_notional:
         return False, f"minNotional {min_notional} > quote_qty {quote_qty}"
     # LOT_SIZE check requires baseQty; approximate baseQty = quote_qty/price
-    if step_size:
+    if step_inv:
         base_qty = quote_qty / max(price, 1e-9)
-        # allow small float tolerance
-        if (base_qty / step_size) % 1 > 1e-6:
+        # Distance to the nearest whole step; `% 1` reads ~0.9999 for valid lots
+        steps = base_qty * step_inv
+        if abs(steps - round(steps)) > 1e-6:
             return False, "LOT_SIZE step mismatch"
     return True, None
-
-
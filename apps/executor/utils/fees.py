@@ -4,8 +4,12 @@ Supports multiple exchanges with tier-based fee structures.
 """
 
 import os
-from typing import Dict, Tuple, Optional
-import httpx
+import time
+from typing import Dict, Tuple, Optional, Union
+import numpy as np
+import orjson
+from libs.schemas.orderbook import OrderBook
+from libs.http import shared_client
 
 
 # Exchange fee structures (maker/taker rates)
@@ -34,6 +38,26 @@ EXCHANGE_FEES: Dict[str, Dict[str, float]] = {
 }
 
 
+_MAX_TIER = 5
+
+
+def _tier_rate(base_rate: float, tier: int) -> float:
+    # Apply tier discounts (simplified - can be enhanced with actual tier data)
+    if tier > 0:
+        discount = min(0.5, tier * 0.1)  # Max 50% discount
+        base_rate *= (1 - discount)
+    return base_rate
+
+
+# (exchange, is_maker, tier) -> rate, resolved once instead of per order
+_FEE_TABLE: Dict[Tuple[str, bool, int], float] = {
+    (ex, mk, t): _tier_rate(rates.get("maker" if mk else "taker", 0.002), t)
+    for ex, rates in EXCHANGE_FEES.items()
+    for mk in (False, True)
+    for t in range(_MAX_TIER + 1)
+}
+
+
 def get_fee_rate(exchange: str, is_maker: bool = False, tier: int = 0) -> float:
     """
     Get fee rate for exchange.
@@ -46,20 +70,9 @@ def get_fee_rate(exchange: str, is_maker: bool = False, tier: int = 0) -> float:
     Returns:
         Fee rate as decimal (e.g., 0.001 = 0.1%)
     """
-    exchange_lower = exchange.lower()
-    if exchange_lower not in EXCHANGE_FEES:
-        # Default to conservative estimate
-        return 0.002  # 0.2%
-    
-    fee_type = "maker" if is_maker else "taker"
-    base_rate = EXCHANGE_FEES[exchange_lower].get(fee_type, 0.002)
-    
-    # Apply tier discounts (simplified - can be enhanced with actual tier data)
-    if tier > 0:
-        discount = min(0.5, tier * 0.1)  # Max 50% discount
-        base_rate *= (1 - discount)
-    
-    return base_rate
+    # Tier discounts stop changing at 50% (tier 5); negative tiers get none
+    tier = min(max(tier, 0), _MAX_TIER)
+    return _FEE_TABLE.get((exchange.lower(), is_maker, tier), 0.002)  # unknown venue: conservative 0.2%
 
 
 def calculate_fees(
@@ -97,8 +110,9 @@ def estimate_slippage_from_orderbook(
     symbol: str,
     side: str,
     quote_qty: float,
-    order_book: Dict,
+    order_book: Union[OrderBook, Dict],
     price_precision: int = 8,
+    mid_price: Optional[float] = None,
 ) -> Tuple[float, float]:
     """
     Estimate slippage and average fill price from order book.
@@ -107,48 +121,41 @@ def estimate_slippage_from_orderbook(
         symbol: Trading pair symbol
         side: 'buy' or 'sell'
         quote_qty: Order size in quote currency
-        order_book: Order book dict with 'bids' and 'asks' arrays
+        order_book: OrderBook, or a dict with 'bids' and 'asks' level lists
         price_precision: Price decimal precision
+        mid_price: Precomputed mid; derived from best bid/ask when omitted
     
     Returns:
         Tuple of (slippage_bps, avg_fill_price)
     """
-    if side.lower() == "buy":
-        levels = order_book.get("asks", [])
-        mid_price_idx = 0
-    else:
-        levels = order_book.get("bids", [])
-        mid_price_idx = 0
+    if not isinstance(order_book, OrderBook):
+        order_book = OrderBook.from_levels(order_book.get("bids", []), order_book.get("asks", []))
+    prices, qtys = order_book.side(side)
     
-    if not levels:
+    if len(prices) == 0:
         return (0.0, 0.0)
     
-    mid_price = (float(levels[0][0]) + float(levels[mid_price_idx][0])) / 2
-    
-    remaining_qty = quote_qty
-    total_base_qty = 0.0
-    total_cost = 0.0
-    
-    for level in levels:
-        level_price = float(level[0])
-        level_qty = float(level[1])
-        level_notional = level_price * level_qty
-        
-        if remaining_qty <= 0:
-            break
-        
-        if remaining_qty <= level_notional:
-            # Partial fill at this level
-            fill_notional = remaining_qty
-            fill_base_qty = fill_notional / level_price
-            total_base_qty += fill_base_qty
-            total_cost += fill_notional
-            remaining_qty = 0
-        else:
-            # Full fill at this level
-            total_base_qty += level_qty
-            total_cost += level_notional
-            remaining_qty -= level_notional
+    if mid_price is None:
+        mid_price = order_book.mid_price()
+    if mid_price is None:
+        # One-sided book: measure against the touch
+        mid_price = float(prices[0])
+    
+    if quote_qty <= 0:
+        return (0.0, mid_price)
+    
+    # First level whose cumulative notional covers the order; levels before it
+    # fill in full, the rest of the order fills partially at that level
+    cum = np.cumsum(prices * qtys)
+    k = int(np.searchsorted(cum, quote_qty))
+    if k < len(cum):
+        filled = float(cum[k - 1]) if k > 0 else 0.0
+        total_base_qty = float(qtys[:k].sum()) + (quote_qty - filled) / float(prices[k])
+        total_cost = quote_qty
+    else:
+        # Book exhausted before the order filled
+        total_base_qty = float(qtys.sum())
+        total_cost = float(cum[-1])
     
     if total_base_qty == 0:
         return (0.0, mid_price)
@@ -161,6 +168,63 @@ def estimate_slippage_from_orderbook(
     return (abs(slippage_bps), round(avg_fill_price, price_precision))
 
 
+ORDERBOOK_TTL_S = float(os.getenv("ORDERBOOK_TTL_S", "0.5"))
+ORDERBOOK_CACHE_MAX = 256
+
+# (exchange, symbol) -> (order_book, expires_at); routing and paper fills
+# ask for the same book within milliseconds of each other
+_BOOKS: Dict[Tuple[str, str], Tuple[OrderBook, float]] = {}
+BOOK_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+_BASE_URLS = {
+    "binance": os.getenv("BINANCE_BASE", "https://api.binance.com"),
+    "kraken": os.getenv("KRAKEN_BASE", "https://api.kraken.com"),
+    "coinbase": os.getenv("COINBASE_BASE", "https://api.exchange.coinbase.com"),
+}
+
+
+async def _fetch_order_book(exchange: str, symbol: str) -> OrderBook:
+    base_url = _BASE_URLS.get(exchange, "https://api.binance.com")
+    
+    # Fetch order book (limit 20 for better depth estimation)
+    client = shared_client()
+    if exchange == "binance":
+        url = f"{base_url}/api/v3/depth?symbol={symbol}&limit=20"
+        r = await client.get(url)
+        r.raise_for_status()
+        ob_data = orjson.loads(r.content)
+        return OrderBook.from_levels(ob_data["bids"], ob_data["asks"])
+    elif exchange == "kraken":
+        # Kraken uses different symbol format and API
+        url = f"{base_url}/0/public/Depth?pair={symbol}&count=20"
+        r = await client.get(url)
+        r.raise_for_status()
+        data = orjson.loads(r.content)
+        # Kraken returns different format - would need parsing
+        return OrderBook.empty()  # Placeholder
+    return OrderBook.empty()
+
+
+async def get_order_book(exchange: str, symbol: str) -> OrderBook:
+    """Order book for (exchange, symbol), reused for ORDERBOOK_TTL_S seconds."""
+    key = (exchange.lower(), symbol)
+    now = time.monotonic()
+    hit = _BOOKS.get(key)
+    if hit is not None and hit[1] > now:
+        BOOK_CACHE_STATS["hits"] += 1
+        return hit[0]
+    BOOK_CACHE_STATS["misses"] += 1
+    order_book = await _fetch_order_book(*key)
+    if len(_BOOKS) >= ORDERBOOK_CACHE_MAX:
+        for k in [k for k, v in _BOOKS.items() if v[1] <= now]:
+            del _BOOKS[k]
+        if len(_BOOKS) >= ORDERBOOK_CACHE_MAX:
+            _BOOKS.clear()
+    _BOOKS[key] = (order_book, now + ORDERBOOK_TTL_S)
+    return order_book
+
+
 async def get_order_book_with_slippage(
     exchange: str,
     symbol: str,
@@ -179,35 +243,12 @@ async def get_order_book_with_slippage(
     Returns:
         Dict with order_book, slippage_bps, avg_fill_price, total_cost
     """
-    base_urls = {
-        "binance": os.getenv("BINANCE_BASE", "https://api.binance.com"),
-        "kraken": os.getenv("KRAKEN_BASE", "https://api.kraken.com"),
-        "coinbase": os.getenv("COINBASE_BASE", "https://api.exchange.coinbase.com"),
-    }
-    
-    base_url = base_urls.get(exchange.lower(), "https://api.binance.com")
-    
-    # Fetch order book (limit 20 for better depth estimation)
-    async with httpx.AsyncClient(timeout=10) as client:
-        if exchange.lower() == "binance":
-            url = f"{base_url}/api/v3/depth?symbol={symbol}&limit=20"
-            r = await client.get(url)
-            r.raise_for_status()
-            ob_data = r.json()
-            order_book = {"bids": ob_data["bids"], "asks": ob_data["asks"]}
-        elif exchange.lower() == "kraken":
-            # Kraken uses different symbol format and API
-            url = f"{base_url}/0/public/Depth?pair={symbol}&count=20"
-            r = await client.get(url)
-            r.raise_for_status()
-            data = r.json()
-            # Kraken returns different format - would need parsing
-            order_book = {"bids": [], "asks": []}  # Placeholder
-        else:
-            order_book = {"bids": [], "asks": []}
+    # Depth is cached per (exchange, symbol); sizing and fees stay per call
+    order_book = await get_order_book(exchange, symbol)
     
+    mid_price = order_book.mid_price()
     slippage_bps, avg_fill_price = estimate_slippage_from_orderbook(
-        symbol, side, quote_qty, order_book
+        symbol, side, quote_qty, order_book, mid_price=mid_price
     )
     
     # Calculate total cost including fees
@@ -215,10 +256,11 @@ async def get_order_book_with_slippage(
     total_cost = quote_qty + fees
     
     return {
-        "order_book": order_book,
+        # Plain lists: this dict ends up in JSON responses via route_order
+        "order_book": order_book.to_legacy_lists(),
         "slippage_bps": slippage_bps,
         "avg_fill_price": avg_fill_price,
-        "mid_price": (float(order_book["bids"][0][0]) + float(order_book["asks"][0][0])) / 2 if order_book["bids"] and order_book["asks"] else avg_fill_price,
+        "mid_price": mid_price if mid_price is not None else avg_fill_price,
         "total_cost": total_cost,
         "fees": fees,
     }
@@ -237,7 +279,8 @@ def calculate_total_cost(
     Returns:
         Dict with fees, slippage_cost, total_cost, cost_bps
     """
-    fees = calculate_fees(exchange, side, quote_qty, is_maker)
+    # Inlined calculate_fees/get_fee_rate (tier 0, no BNB discount); called per venue per route
+    fees = quote_qty * _FEE_TABLE.get((exchange.lower(), is_maker, 0), 0.002)
     slippage_cost = quote_qty * (slippage_bps / 10000)
     total_cost = fees + slippage_cost
     cost_bps = (total_cost / quote_qty) * 10000
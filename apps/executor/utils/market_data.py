@@ -1,23 +1,51 @@
-import os, json, httpx
+import os, time, asyncio
+import orjson
+from libs.http import shared_client
 
 
 DATA_BASE = os.getenv("BINANCE_DATA_BASE", "https://api.binance.com")
+CLOSE_TTL_S = float(os.getenv("CLOSE_TTL_S", "1.0"))
 
+# (symbol, interval) -> (close, expires_at)
+_CLOSES: dict = {}
+# (symbol, interval) -> in-flight fetch task; concurrent misses share one request
+_INFLIGHT: dict = {}
+CLOSE_CACHE_STATS = {"hits": 0, "misses": 0, "coalesced": 0}
 
-async def get_latest_close_http(symbol: str, interval: str = "1m") -> float:
+
+async def _fetch_close(key) -> float:
+    symbol, interval = key
     url = f"{DATA_BASE}/api/v3/klines?symbol={symbol}&interval={interval}&limit=1"
-    async with httpx.AsyncClient(timeout=10) as c:
-        r = await c.get(url)
-        r.raise_for_status()
-        data = r.json()
+    r = await shared_client().get(url)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
     # kline schema: [open time, open, high, low, close, volume, ...]
     close = float(data[0][4])
+    _CLOSES[key] = (close, time.monotonic() + CLOSE_TTL_S)
     return close
 
 
+async def get_latest_close_http(symbol: str, interval: str = "1m") -> float:
+    key = (symbol, interval)
+    hit = _CLOSES.get(key)
+    if hit is not None and hit[1] > time.monotonic():
+        CLOSE_CACHE_STATS["hits"] += 1
+        return hit[0]
+    task = _INFLIGHT.get(key)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        CLOSE_CACHE_STATS["coalesced"] += 1
+    else:
+        CLOSE_CACHE_STATS["misses"] += 1
+        task = asyncio.ensure_future(_fetch_close(key))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _INFLIGHT.pop(key, None) if _INFLIGHT.get(key) is t else None)
+    # shield: one caller giving up must not cancel the fetch the others await
+    return await asyncio.shield(task)
+
+
 def get_latest_close_replay(path: str) -> float:
-    with open(path, "r") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())
     return float(data[0][4])
 
 
@@ -7,7 +7,6 @@ import os
 import time
 from typing import Dict, Optional
 from datetime import datetime
-import httpx
 from apps.executor.utils.market_data import get_latest_close_http
 from apps.executor.utils.fees import calculate_fees, estimate_slippage_from_orderbook, get_order_book_with_slippage
 from apps.analytics.positions import open_position, close_position
@@ -44,19 +43,22 @@ async def simulate_paper_fill(
     Returns:
         Simulated execution result matching real exchange format
     """
-    # Get current market price
-    try:
-        price = await get_latest_close_http(symbol, "1m")
-    except Exception:
-        # Fallback to mid-price estimation
-        price = 50000.0  # Placeholder
-    
-    # Get order book for realistic slippage
+    # Order book first: its depth prices the fill, so the klines call is only
+    # needed when no book is available (venue down or not parsed yet)
+    avg_fill_price = None
     try:
         ob_data = await get_order_book_with_slippage(venue, symbol, side, quote_qty)
-        avg_fill_price = ob_data.get("avg_fill_price", price)
-        slippage_bps = ob_data.get("slippage_bps", 5.0)
+        if ob_data.get("avg_fill_price"):
+            avg_fill_price = ob_data["avg_fill_price"]
+            slippage_bps = ob_data.get("slippage_bps", 5.0)
     except Exception:
+        pass
+    
+    if avg_fill_price is None:
+        try:
+            price = await get_latest_close_http(symbol, "1m")
+        except Exception:
+            price = 50000.0  # Placeholder
         # Fallback with estimated slippage
         slippage_bps = 5.0  # 5 bps default
         if side.lower() == "buy":
@@ -83,16 +85,17 @@ async def simulate_paper_fill(
         "commissionAsset": "USDT",
     }
     
+    # Numeric fields stay numeric; execute_paper_trade and the positions
+    # table read them as floats, so no Binance-style string round trip
     result = {
-        "status": "paper_filled",
         "symbol": symbol,
         "orderId": order_id,
         "clientOrderId": order_id,
         "transactTime": int(time.time() * 1000),
-        "price": str(avg_fill_price),
-        "origQty": str(base_qty),
-        "executedQty": str(base_qty),
-        "cummulativeQuoteQty": str(quote_qty),
+        "price": avg_fill_price,
+        "origQty": base_qty,
+        "executedQty": base_qty,
+        "cummulativeQuoteQty": quote_qty,
         "status": "FILLED",
         "timeInForce": "GTC",
         "type": "MARKET",
@@ -124,8 +127,8 @@ async def execute_paper_trade(
     
     # Track position
     try:
-        base_qty = float(fill_result["executedQty"])
-        entry_price = float(fill_result["avg_price"])
+        base_qty = fill_result["executedQty"]
+        entry_price = fill_result["avg_price"]
         fees = fill_result.get("fees", 0.0)
         
         position_id = open_position(
@@ -4,6 +4,8 @@ Minimizes total cost (fees + slippage) across multiple venues.
 """
 
 import os
+import math
+import asyncio
 from typing import Dict, List, Optional, Tuple
 import httpx
 from apps.executor.utils.fees import (
@@ -34,9 +36,7 @@ async def get_best_venue(
     if available_venues is None:
         available_venues = ["binance", "kraken", "coinbase"]
     
-    venue_costs = []
-    
-    for venue in available_venues:
+    async def venue_cost(venue: str) -> Dict:
         try:
             # Get order book and slippage estimate
             ob_data = await get_order_book_with_slippage(venue, symbol, side, quote_qty)
@@ -50,7 +50,7 @@ async def get_best_venue(
                 venue, side, quote_qty, slippage_bps, is_maker=False
             )
             
-            venue_costs.append({
+            return {
                 "venue": venue,
                 "total_cost": total_cost,
                 "fees": fees,
@@ -59,20 +59,30 @@ async def get_best_venue(
                 "avg_fill_price": ob_data.get("avg_fill_price"),
                 "mid_price": ob_data.get("mid_price"),
                 "available": True,
-            })
+            }
         except Exception as e:
             # Venue unavailable or error
-            venue_costs.append({
+            return {
                 "venue": venue,
                 "total_cost": float("inf"),
                 "available": False,
                 "error": str(e),
-            })
+            }
+    
+    # Query all venues concurrently; latency is the slowest venue, not the sum
+    venue_costs = list(await asyncio.gather(*(venue_cost(v) for v in available_venues)))
     
-    # Filter available venues
-    available = [v for v in venue_costs if v.get("available", False)]
+    # One pass: cheapest venue and worst cost_bps; unavailable venues carry
+    # total_cost=inf so they never win
+    best = None
+    worst_bps = -math.inf
+    for v in venue_costs:
+        if v["total_cost"] < (best["total_cost"] if best is not None else math.inf):
+            best = v
+        if v["available"] and v["cost_bps"] > worst_bps:
+            worst_bps = v["cost_bps"]
     
-    if not available:
+    if best is None:
         # Fallback to Binance
         return {
             "best_venue": "binance",
@@ -82,9 +92,6 @@ async def get_best_venue(
             "routing_reason": "fallback - no venues available",
         }
     
-    # Find venue with lowest total cost
-    best = min(available, key=lambda x: x["total_cost"])
-    
     return {
         "best_venue": best["venue"],
         "total_cost": best["total_cost"],
@@ -94,11 +101,7 @@ async def get_best_venue(
         "avg_fill_price": best.get("avg_fill_price"),
         "all_venues": venue_costs,
         "routing_reason": f"lowest cost: {best['cost_bps']:.2f} bps",
-        "savings_vs_worst": (
-            max(v["cost_bps"] for v in available) - best["cost_bps"]
-            if len(available) > 1
-            else 0.0
-        ),
+        "savings_vs_worst": worst_bps - best["cost_bps"],
     }
 
 
@@ -1,4 +1,18 @@
-import base64, hashlib, hmac, time, httpx, os
+import base64, hashlib, hmac, time, os
+from urllib.parse import urlencode
+import orjson
+from libs.http import shared_client
+
+
+# (secret_b64, keyed HMAC-SHA512) -- decode and key schedule once, copy per request
+_HMAC_TMPL = None
+
+
+def _signer(secret_b64: str):
+    global _HMAC_TMPL
+    if _HMAC_TMPL is None or _HMAC_TMPL[0] != secret_b64:
+        _HMAC_TMPL = (secret_b64, hmac.new(base64.b64decode(secret_b64), digestmod=hashlib.sha512))
+    return _HMAC_TMPL[1].copy()
 
 
 async def kraken_private(path: str, data: dict):
@@ -6,16 +20,17 @@ async def kraken_private(path: str, data: dict):
     secret_b64 = os.getenv("KRAKEN_API_SECRET", "")
     if not api_key or not secret_b64:
         raise RuntimeError("Missing KRAKEN_API_KEY/SECRET")
-    secret = base64.b64decode(secret_b64)
     nonce = str(int(time.time() * 1000))
     data["nonce"] = nonce
-    post = "&".join([f"{k}={v}" for k, v in data.items()])
-    message = path.encode() + hashlib.sha256((nonce + post).encode()).digest()
-    sig = hmac.new(secret, message, hashlib.sha512).digest()
-    headers = {"API-Key": api_key, "API-Sign": base64.b64encode(sig).decode()}
+    # Sign exactly the body that is sent
+    post = urlencode(data)
+    sig = _signer(secret_b64)
+    sig.update(path.encode() + hashlib.sha256((nonce + post).encode()).digest())
+    headers = {
+        "API-Key": api_key,
+        "API-Sign": base64.b64encode(sig.digest()).decode(),
+        "Content-Type": "application/x-www-form-urlencoded",
+    }
     url = f"https://api.kraken.com{path}"
-    async with httpx.AsyncClient(timeout=15) as c:
-        r = await c.post(url, data=data, headers=headers)
-    return r.json()
-
-
+    r = await shared_client().post(url, content=post, headers=headers, timeout=15)
+    return orjson.loads(r.content)
@@ -3,14 +3,39 @@ from pydantic import BaseModel
 from temporalio.client import Client
 from libs.schemas.proposal import Proposal
 from apps.temporal_worker.workflows_pure import TraderWorkflow
+from apps.temporal_worker.converter import DATA_CONVERTER
 import uuid, asyncio
 import os, httpx, time
 import psycopg
+import orjson
 from apps.attention.aslf import aslf_score
 from apps.analytics.equity import update_equity
+from libs.http import shared_client, aclose_shared_client
+from apps.rag.collector import shutdown_parse_pool
 
 
 app = FastAPI()
+app.state.temporal = None
+app.state.preflight = None
+
+TEMPORAL_ADDRESS = os.getenv("TEMPORAL_ADDRESS", "temporal:7233")
+PREFLIGHT_TTL_S = float(os.getenv("PREFLIGHT_TTL_S", "5.0"))
+# Prefer friction base for unauthenticated checks
+PREFLIGHT_BASES = [b for b in (os.getenv("BINANCE_FRICTION_BASE"), os.getenv("BINANCE_BASE", "https://api.binance.com")) if b]
+
+
+async def temporal_client() -> Client:
+    # One connection per process; Client.connect is a fresh gRPC handshake
+    if app.state.temporal is None:
+        app.state.temporal = await Client.connect(TEMPORAL_ADDRESS, data_converter=DATA_CONVERTER)
+    return app.state.temporal
+
+
+async def _warm_temporal():
+    try:
+        await temporal_client()
+    except Exception as e:
+        print(f"Temporal not reachable at startup, will retry on first use: {e}")
 
 # Keep-alive mechanism for free tier (prevents spin-down)
 async def keep_alive_loop():
@@ -19,8 +44,7 @@ async def keep_alive_loop():
     while True:
         try:
             # Lightweight self-ping to keep service active
-            async with httpx.AsyncClient() as client:
-                await client.get(f"http://localhost:{os.getenv('PORT', '8000')}/status", timeout=5)
+            await shared_client().get(f"http://localhost:{os.getenv('PORT', '8000')}/status", timeout=5)
         except Exception:
             pass  # Ignore errors, just keep trying
         await asyncio.sleep(600)  # Every 10 minutes
@@ -29,6 +53,13 @@ async def keep_alive_loop():
 async def startup_event():
     """Start keep-alive loop on startup"""
     asyncio.create_task(keep_alive_loop())
+    asyncio.create_task(_warm_temporal())
+
+
+@app.on_event("shutdown")
+async def _close_http():
+    await aclose_shared_client()
+    shutdown_parse_pool()
 
 
 class SubmitReq(BaseModel):
@@ -46,12 +77,14 @@ async def submit_proposal(body: SubmitReq, background_tasks: BackgroundTasks, id
 
     async def _kickoff():
         try:
-            client = await Client.connect("temporal:7233")
+            client = await temporal_client()
             handle = await client.start_workflow(
                 TraderWorkflow.run,
                 body.proposal.model_dump(mode="json"),
                 id=run_id,
                 task_queue="trader-tq",
+                # Dispatched straight back to a worker sharing this client, if any
+                request_eager_start=True,
             )
             print(f"✅ Workflow {run_id} started: {handle.id}")
         except Exception as e:
@@ -65,38 +98,60 @@ async def submit_proposal(body: SubmitReq, background_tasks: BackgroundTasks, id
 
 @app.get("/preflight")
 async def preflight():
-    # Prefer friction base for unauthenticated checks
-    bases = []
-    fb = os.getenv("BINANCE_FRICTION_BASE")
-    if fb:
-        bases.append(fb)
-    bases.append(os.getenv("BINANCE_BASE", "https://api.binance.com"))
-    out = {"binance": {}, "temporal": {}}
+    # /metrics and /health call this on every scrape; serve a recent result
+    # instead of re-probing Binance and Temporal each time
+    cached = app.state.preflight
+    now = time.monotonic()
+    if cached is not None and cached["expires_at"] > now:
+        return cached["value"]
+    out = await _preflight()
+    app.state.preflight = {"value": out, "expires_at": now + PREFLIGHT_TTL_S}
+    return out
+
+
+async def _binance_probe(bases: list[str]) -> dict:
     headers = {"User-Agent": "MasterTrader/1.0", "Accept": "application/json"}
-    async with httpx.AsyncClient(timeout=10, headers=headers) as c:
-        # server time and ping
-        for base in bases:
-            try:
-                t = await c.get(f"{base}/api/v3/time")
-                if t.status_code in (451, 403, 429):
-                    raise httpx.HTTPStatusError(f"HTTP {t.status_code}", request=t.request, response=t)
-                srv_ms = t.json().get("serverTime")
-                drift_ms = abs(int(time.time() * 1000) - int(srv_ms)) if srv_ms else None
-                out["binance"]["server_time_ms"] = srv_ms
-                out["binance"]["clock_drift_ms"] = drift_ms
-                p = await c.get(f"{base}/api/v3/ping")
-                out["binance"]["ping_status"] = p.status_code
-                break
-            except Exception as e:
-                out["binance"]["ping_error"] = str(e)
-                continue
-    # Temporal connectivity
+    c = shared_client()
+
+    async def probe(base: str) -> dict:
+        # server time and ping; any 4xx/5xx (451/403/429 included) fails this base
+        t = await c.get(f"{base}/api/v3/time", headers=headers)
+        t.raise_for_status()
+        srv_ms = orjson.loads(t.content).get("serverTime")
+        drift_ms = abs(int(time.time() * 1000) - int(srv_ms)) if srv_ms else None
+        p = await c.get(f"{base}/api/v3/ping", headers=headers)
+        return {"server_time_ms": srv_ms, "clock_drift_ms": drift_ms, "ping_status": p.status_code}
+
+    # Race all bases; first successful probe wins, the rest are cancelled
+    tasks = [asyncio.create_task(probe(b)) for b in bases]
+    pending = set(tasks)
+    last_exc = None
     try:
-        client = await Client.connect("temporal:7233")
-        out["temporal"]["connected"] = True
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in tasks:
+                if t not in done:
+                    continue
+                if t.exception() is None:
+                    return t.result()
+                last_exc = t.exception()
+    finally:
+        for t in pending:
+            t.cancel()
+    return {"ping_error": str(last_exc)}
+
+
+async def _temporal_probe() -> dict:
+    try:
+        client = await temporal_client()
+        return {"connected": await client.service_client.check_health()}
     except Exception as e:
-        out["temporal"]["error"] = str(e)
-    return out
+        return {"error": str(e)}
+
+
+async def _preflight():
+    binance, temporal = await asyncio.gather(_binance_probe(PREFLIGHT_BASES), _temporal_probe())
+    return {"binance": binance, "temporal": temporal}
 
 
 @app.get("/metrics")
@@ -106,7 +161,8 @@ async def metrics():
     stats = {"equity": 10000.0, "high_water_mark": 10000.0, "max_drawdown": 0.0, "romad": None}
     # Update equity snapshot (mark-only path)
     try:
-        snap = update_equity(mark_only=True)
+        # Sync DB work; keep it off the event loop
+        snap = await asyncio.to_thread(update_equity, True)
         if isinstance(snap, dict):
             stats = {
                 "equity": snap.get("equity", stats["equity"]),
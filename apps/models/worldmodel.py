@@ -1,19 +1,38 @@
-import statistics
-from typing import List
+import math
+from typing import List, Union
 
+import numpy as np
 
-def probability_drawdown_exceeds(returns: List[float], horizon_steps: int, dd_limit_bps: float) -> float:
+from libs.jit import njit, warmup
+
+
+@njit(cache=True)
+def _expected_drawdown(returns, horizon_steps):
+    # Single pass for mean and population variance (Welford)
+    n = returns.shape[0]
+    mu = 0.0
+    m2 = 0.0
+    for i in range(n):
+        d = returns[i] - mu
+        mu += d / (i + 1)
+        m2 += d * (returns[i] - mu)
+    sigma = math.sqrt(m2 / n)
+    if sigma == 0.0:
+        sigma = 1e-6
+    return abs(mu) * horizon_steps + 2 * sigma * math.sqrt(horizon_steps)
+
+
+warmup(_expected_drawdown, np.zeros(2), 1)
+
+
+def probability_drawdown_exceeds(returns: Union[List[float], np.ndarray], horizon_steps: int, dd_limit_bps: float) -> float:
     """Return probability proxy that drawdown exceeds limit.
 
     Uses a simple normal approximation on per-step returns to estimate a
     conservative drawdown magnitude over the horizon and compares it to a
     bps limit. Returns 1.0 if expected drawdown exceeds the limit, else 0.0.
     """
-    if not returns:
+    if len(returns) == 0:
         return 0.0
-    mu = statistics.fmean(returns)
-    sigma = statistics.pstdev(returns) or 1e-6
-    import math
-    expected_dd = abs(mu) * horizon_steps + 2 * sigma * math.sqrt(horizon_steps)
+    expected_dd = _expected_drawdown(np.asarray(returns, dtype=np.float64), horizon_steps)
     return 1.0 if expected_dd * 1e4 > dd_limit_bps else 0.0
-
@@ -4,103 +4,163 @@ Automatically adjusts parameters based on performance.
 """
 
 import os
-import psycopg
 import asyncio
-from typing import Dict, Optional
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+from apps.monitor.metrics import DB_LATENCY, start_metrics_server
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 
 
+PG_POOL_TIMEOUT_S = float(os.getenv("PG_POOL_TIMEOUT_S", "5"))
+
+# Fixed statements, executed with prepare=True so each pooled connection
+# plans them once
+
+# Ratios are computed server-side; COALESCE keeps every column a plain number
+_RECENT_PERF_SQL = """
+    SELECT
+        COUNT(*) AS total_trades,
+        COUNT(*) FILTER (WHERE realized_pnl > 0) AS winning_trades,
+        COUNT(*) FILTER (WHERE realized_pnl < 0) AS losing_trades,
+        COALESCE(COUNT(*) FILTER (WHERE realized_pnl > 0)::float8 / NULLIF(COUNT(*), 0), 0) AS win_rate,
+        COALESCE(AVG(realized_pnl), 0)::float8 AS avg_pnl,
+        COALESCE(SUM(realized_pnl), 0)::float8 AS total_pnl,
+        COALESCE(AVG(realized_pnl) FILTER (WHERE realized_pnl > 0), 0)::float8 AS avg_win,
+        COALESCE(AVG(ABS(realized_pnl)) FILTER (WHERE realized_pnl < 0), 0)::float8 AS avg_loss,
+        COALESCE(
+            SUM(realized_pnl) FILTER (WHERE realized_pnl > 0)
+                / NULLIF(-SUM(realized_pnl) FILTER (WHERE realized_pnl < 0), 0),
+            0
+        )::float8 AS profit_factor
+    FROM positions
+    WHERE closed_at > NOW() - %s::interval
+"""
+
+_ASLF_PERF_SQL = """
+    SELECT 
+        aas.decision,
+        COUNT(*) as decision_count,
+        AVG(p.realized_pnl) as avg_pnl,
+        SUM(CASE WHEN p.realized_pnl > 0 THEN 1 ELSE 0 END) as wins,
+        SUM(CASE WHEN p.realized_pnl < 0 THEN 1 ELSE 0 END) as losses
+    FROM attention_aslf aas
+    LEFT JOIN positions p ON p.symbol = aas.symbol 
+        AND p.opened_at BETWEEN aas.ts AND aas.ts + INTERVAL '1 hour'
+    WHERE aas.ts > NOW() - INTERVAL '24 hours'
+    GROUP BY aas.decision
+"""
+
+# One statement for every hypothesis: aggregate last week's closed positions
+# per symbol, add wins to alpha and losses to beta, and promote once the
+# posterior mean reaches 0.7
+_BANDIT_UPDATE_SQL = """
+    WITH agg AS (
+        SELECT
+            symbol,
+            SUM(CASE WHEN realized_pnl > 0 THEN 1.0 ELSE 0.0 END) AS wins,
+            SUM(CASE WHEN realized_pnl < 0 THEN 1.0 ELSE 0.0 END) AS losses
+        FROM positions
+        WHERE closed_at > NOW() - INTERVAL '7 days'
+        GROUP BY symbol
+    )
+    UPDATE hypotheses h SET
+        alpha = h.alpha + agg.wins,
+        beta = h.beta + agg.losses,
+        promoted = h.promoted OR (h.alpha + agg.wins)
+            / GREATEST(1.0, h.alpha + h.beta + agg.wins + agg.losses) >= 0.7,
+        updated_at = NOW()
+    FROM agg
+    WHERE REPLACE(h.key, 'aslf:', '') = agg.symbol
+      AND (agg.wins > 0 OR agg.losses > 0)
+    RETURNING h.key, h.alpha, h.beta, h.promoted
+"""
+
+
+def _recent_perf(row: Optional[Dict]) -> Dict:
+    if row and row["total_trades"]:
+        return row
+    return {
+        "total_trades": 0,
+        "winning_trades": 0,
+        "losing_trades": 0,
+        "win_rate": 0,
+        "avg_pnl": 0,
+        "total_pnl": 0,
+        "avg_win": 0,
+        "avg_loss": 0,
+        "profit_factor": 0,
+    }
+
+
+def _aslf_perf(rows) -> Dict:
+    results = {}
+    for row in rows:
+        wins = row["wins"] or 0
+        losses = row["losses"] or 0
+        results[row["decision"]] = {
+            "count": row["decision_count"],
+            "avg_pnl": float(row["avg_pnl"] or 0),
+            "wins": wins,
+            "losses": losses,
+            "win_rate": wins / max(1, wins + losses),
+        }
+    return results
+
+
 class AutoOptimizer:
     """Automatically optimizes trading parameters based on performance."""
     
     def __init__(self):
         self.db_dsn = os.getenv("PG_DSN", "postgresql://trader:traderpw@db:5432/mastertrader")
         self.optimization_interval = int(os.getenv("OPTIMIZATION_INTERVAL_S", "3600"))  # 1 hour
+        # Opened on first use and kept across cycles instead of reconnecting per query
+        self.pool = ConnectionPool(
+            self.db_dsn,
+            min_size=2,
+            max_size=10,
+            timeout=PG_POOL_TIMEOUT_S,
+            open=False,
+        )
+    
+    def _connection(self):
+        if self.pool.closed:
+            self.pool.open(wait=False)
+        return self.pool.connection()
     
     def get_recent_performance(self, hours: int = 24) -> Dict:
         """Get recent trading performance metrics."""
-        with psycopg.connect(self.db_dsn) as conn:
+        with self._connection() as conn:
             # Get closed positions from last N hours
-            cur = conn.execute(
-                """
-                SELECT 
-                    COUNT(*) as total_trades,
-                    SUM(CASE WHEN realized_pnl > 0 THEN 1 ELSE 0 END) as winning_trades,
-                    SUM(CASE WHEN realized_pnl < 0 THEN 1 ELSE 0 END) as losing_trades,
-                    AVG(realized_pnl) as avg_pnl,
-                    SUM(realized_pnl) as total_pnl,
-                    AVG(CASE WHEN realized_pnl > 0 THEN realized_pnl ELSE NULL END) as avg_win,
-                    AVG(CASE WHEN realized_pnl < 0 THEN ABS(realized_pnl) ELSE NULL END) as avg_loss
-                FROM positions
-                WHERE closed_at > NOW() - INTERVAL '%s hours'
-                """,
-                (hours,),
-            )
-            row = cur.fetchone()
-            
-            if row and row[0]:
-                return {
-                    "total_trades": row[0],
-                    "winning_trades": row[1] or 0,
-                    "losing_trades": row[2] or 0,
-                    "win_rate": (row[1] or 0) / row[0] if row[0] > 0 else 0,
-                    "avg_pnl": float(row[3] or 0),
-                    "total_pnl": float(row[4] or 0),
-                    "avg_win": float(row[5] or 0),
-                    "avg_loss": float(row[6] or 0),
-                    "profit_factor": (float(row[5] or 0) * (row[1] or 0)) / (float(row[6] or 0) * (row[2] or 1)) if row[2] and row[6] else 0,
-                }
-        
-        return {
-            "total_trades": 0,
-            "winning_trades": 0,
-            "losing_trades": 0,
-            "win_rate": 0,
-            "avg_pnl": 0,
-            "total_pnl": 0,
-            "avg_win": 0,
-            "avg_loss": 0,
-            "profit_factor": 0,
-        }
+            cur = conn.cursor(row_factory=dict_row)
+            with DB_LATENCY.labels("recent_perf").time():
+                row = cur.execute(_RECENT_PERF_SQL, (f"{hours} hours",), prepare=True).fetchone()
+            return _recent_perf(row)
     
     def get_aslf_performance(self) -> Dict:
         """Analyze ASLF decision performance."""
-        with psycopg.connect(self.db_dsn) as conn:
+        with self._connection() as conn:
             # Get ASLF decisions and correlate with outcomes
-            cur = conn.execute(
-                """
-                SELECT 
-                    aas.decision,
-                    COUNT(*) as decision_count,
-                    AVG(p.realized_pnl) as avg_pnl,
-                    SUM(CASE WHEN p.realized_pnl > 0 THEN 1 ELSE 0 END) as wins,
-                    SUM(CASE WHEN p.realized_pnl < 0 THEN 1 ELSE 0 END) as losses
-                FROM attention_aslf aas
-                LEFT JOIN positions p ON p.symbol = aas.symbol 
-                    AND p.opened_at BETWEEN aas.ts AND aas.ts + INTERVAL '1 hour'
-                WHERE aas.ts > NOW() - INTERVAL '24 hours'
-                GROUP BY aas.decision
-                """
-            )
-            
-            results = {}
-            for row in cur.fetchall():
-                decision, count, avg_pnl, wins, losses = row
-                results[decision] = {
-                    "count": count,
-                    "avg_pnl": float(avg_pnl or 0),
-                    "wins": wins or 0,
-                    "losses": losses or 0,
-                    "win_rate": (wins or 0) / max(1, (wins or 0) + (losses or 0)),
-                }
-            
-            return results
+            cur = conn.cursor(row_factory=dict_row)
+            with DB_LATENCY.labels("aslf_perf").time():
+                rows = cur.execute(_ASLF_PERF_SQL, prepare=True).fetchall()
+            return _aslf_perf(rows)
     
-    def optimize_aslf_thresholds(self) -> Optional[Dict]:
+    def get_performance_snapshot(self, hours: int = 24) -> Tuple[Dict, Dict]:
+        """Recent and ASLF performance from one connection in a single round-trip."""
+        with self._connection() as conn:
+            # Pipeline mode sends both statements before waiting on either result
+            with DB_LATENCY.labels("performance_snapshot").time(), conn.pipeline():
+                recent = conn.cursor(row_factory=dict_row).execute(_RECENT_PERF_SQL, (f"{hours} hours",), prepare=True)
+                aslf = conn.cursor(row_factory=dict_row).execute(_ASLF_PERF_SQL, prepare=True)
+            return _recent_perf(recent.fetchone()), _aslf_perf(aslf.fetchall())
+    
+    def optimize_aslf_thresholds(self, recent_perf: Optional[Dict] = None, aslf_perf: Optional[Dict] = None) -> Optional[Dict]:
         """Optimize ASLF thresholds based on performance."""
-        perf = self.get_aslf_performance()
-        recent_perf = self.get_recent_performance(24)
+        perf = aslf_perf if aslf_perf is not None else self.get_aslf_performance()
+        if recent_perf is None:
+            recent_perf = self.get_recent_performance(24)
         
         # If we're denying too many profitable trades, lower threshold
         # If we're allowing too many unprofitable trades, raise threshold
@@ -126,52 +186,18 @@ class AutoOptimizer:
     
     def optimize_bandit_parameters(self) -> None:
         """Update bandit parameters based on actual outcomes."""
-        with psycopg.connect(self.db_dsn) as conn:
-            # Get all hypotheses
-            cur = conn.execute("SELECT key, alpha, beta, promoted FROM hypotheses")
+        with self._connection() as conn:
+            cur = conn.cursor(row_factory=dict_row)
+            with DB_LATENCY.labels("bandit_update").time():
+                cur.execute(_BANDIT_UPDATE_SQL, prepare=True)
             
             for row in cur.fetchall():
-                key, alpha, beta, promoted = row
-                symbol = key.replace("aslf:", "")
-                
-                # Get actual performance for this symbol
-                perf_cur = conn.execute(
-                    """
-                    SELECT 
-                        SUM(CASE WHEN realized_pnl > 0 THEN 1.0 ELSE 0.0 END) as wins,
-                        SUM(CASE WHEN realized_pnl < 0 THEN 1.0 ELSE 0.0 END) as losses,
-                        AVG(realized_pnl) as avg_pnl
-                    FROM positions
-                    WHERE symbol = %s AND closed_at > NOW() - INTERVAL '7 days'
-                    """,
-                    (symbol,),
-                )
-                perf_row = perf_cur.fetchone()
-                
-                if perf_row and (perf_row[0] or perf_row[1]):
-                    wins = float(perf_row[0] or 0)
-                    losses = float(perf_row[1] or 0)
-                    
-                    # Update alpha/beta based on actual outcomes
-                    # Simple: add wins to alpha, losses to beta
-                    new_alpha = float(alpha) + wins
-                    new_beta = float(beta) + losses
-                    
-                    # Update promotion status
-                    p_mean = new_alpha / max(1.0, new_alpha + new_beta)
-                    new_promoted = promoted or (p_mean >= 0.7)
-                    
-                    conn.execute(
-                        "UPDATE hypotheses SET alpha = %s, beta = %s, promoted = %s, updated_at = NOW() WHERE key = %s",
-                        (new_alpha, new_beta, new_promoted, key),
-                    )
-                    conn.commit()
-                    
-                    print(f"Updated {key}: α={new_alpha:.2f}, β={new_beta:.2f}, promoted={new_promoted}")
+                print(f"Updated {row['key']}: α={float(row['alpha']):.2f}, β={float(row['beta']):.2f}, promoted={row['promoted']}")
     
-    def optimize_position_sizing(self) -> Optional[Dict]:
+    def optimize_position_sizing(self, recent_perf: Optional[Dict] = None) -> Optional[Dict]:
         """Optimize position sizing based on performance."""
-        recent_perf = self.get_recent_performance(24)
+        if recent_perf is None:
+            recent_perf = self.get_recent_performance(24)
         
         current_max_size = float(os.getenv("MAX_POSITION_SIZE_PCT", "20.0"))
         
@@ -192,8 +218,11 @@ class AutoOptimizer:
         """Run one optimization cycle."""
         print(f"[{datetime.now()}] Running optimization cycle...")
         
+        # Both optimizers read the same 24h window; query it once per cycle
+        recent_perf, aslf_perf = self.get_performance_snapshot(24)
+        
         # Optimize ASLF thresholds
-        aslf_opts = self.optimize_aslf_thresholds()
+        aslf_opts = self.optimize_aslf_thresholds(recent_perf, aslf_perf)
         if aslf_opts:
             # In production, would update environment or config
             print(f"ASLF optimizations: {aslf_opts}")
@@ -202,7 +231,7 @@ class AutoOptimizer:
         self.optimize_bandit_parameters()
         
         # Optimize position sizing
-        size_opts = self.optimize_position_sizing()
+        size_opts = self.optimize_position_sizing(recent_perf)
         if size_opts:
             print(f"Position sizing optimizations: {size_opts}")
         
@@ -211,14 +240,18 @@ class AutoOptimizer:
     async def run_continuous(self):
         """Run continuous optimization loop."""
         print(f"[{datetime.now()}] Starting continuous optimizer (interval: {self.optimization_interval}s)")
+        start_metrics_server()
         
-        while True:
-            try:
-                await self.run_optimization_cycle()
-            except Exception as e:
-                print(f"Error in optimization cycle: {e}")
-            
-            await asyncio.sleep(self.optimization_interval)
+        try:
+            while True:
+                try:
+                    await self.run_optimization_cycle()
+                except Exception as e:
+                    print(f"Error in optimization cycle: {e}")
+                
+                await asyncio.sleep(self.optimization_interval)
+        finally:
+            self.pool.close()
 
 
 if __name__ == "__main__":
@@ -5,11 +5,59 @@ Checks all services, database, and trading health.
 
 import os
 import time
-import httpx
+import asyncio
+import functools
 import psycopg
+from libs.http import shared_client, run as run_sync
+from apps.monitor.metrics import CHECK_CACHE, PROBE_LATENCY
 from typing import Dict, List, Optional
 from datetime import datetime
 
+try:
+    import docker
+except ImportError:  # docker SDK is optional; restarts fall back to the compose CLI
+    docker = None
+
+
+HEALTH_CHECK_TTL_S = float(os.getenv("HEALTH_CHECK_TTL_S", "5.0"))
+FULL_HEALTH_TTL_S = float(os.getenv("FULL_HEALTH_TTL_S", "2.0"))
+COMPOSE_FILE = os.getenv("COMPOSE_FILE_PATH", "infra/docker-compose.yml")
+
+_DOCKER = None
+
+
+def _ttl_cached(ttl: float):
+    """Reuse a check's last result for `ttl` seconds, per monitor instance."""
+    def deco(fn):
+        name = fn.__name__
+        
+        def fresh(self):
+            hit = self._cache.get(name)
+            if hit is not None and hit[1] > time.monotonic():
+                CHECK_CACHE.labels(name, "hit").inc()
+                return hit[0]
+            CHECK_CACHE.labels(name, "miss").inc()
+            return None
+        
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(self):
+                value = fresh(self)
+                if value is None:
+                    value = await fn(self)
+                    self._cache[name] = (value, time.monotonic() + ttl)
+                return value
+        else:
+            @functools.wraps(fn)
+            def wrapper(self):
+                value = fresh(self)
+                if value is None:
+                    value = fn(self)
+                    self._cache[name] = (value, time.monotonic() + ttl)
+                return value
+        return wrapper
+    return deco
+
 
 class HealthMonitor:
     """Monitors system health and triggers alerts/recovery."""
@@ -19,68 +67,77 @@ class HealthMonitor:
         self.executor_url = os.getenv("EXECUTOR_URL", "http://localhost:8001")
         self.temporal_url = os.getenv("TEMPORAL_URL", "http://localhost:7233")
         self.db_dsn = os.getenv("PG_DSN", "postgresql://trader:traderpw@db:5432/mastertrader")
+        # check name -> (result, expires_at); bursts of scrapes share one probe
+        self._cache: Dict[str, tuple] = {}
     
-    def check_gateway(self) -> Dict:
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
+    async def check_gateway(self) -> Dict:
         """Check gateway service health."""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.get(f"{self.gateway_url}/status")
-                if r.status_code == 200:
-                    return {"status": "healthy", "response_time_ms": r.elapsed.total_seconds() * 1000}
+            with PROBE_LATENCY.labels("gateway").time():
+                r = await shared_client().get(f"{self.gateway_url}/status", timeout=5)
+            if r.status_code == 200:
+                return {"status": "healthy", "response_time_ms": r.elapsed.total_seconds() * 1000}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
         return {"status": "unhealthy", "error": "unknown"}
     
-    def check_executor(self) -> Dict:
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
+    async def check_executor(self) -> Dict:
         """Check executor service health."""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.get(f"{self.executor_url}/status")
-                if r.status_code == 200:
-                    return {"status": "healthy", "response_time_ms": r.elapsed.total_seconds() * 1000}
+            with PROBE_LATENCY.labels("executor").time():
+                r = await shared_client().get(f"{self.executor_url}/status", timeout=5)
+            if r.status_code == 200:
+                return {"status": "healthy", "response_time_ms": r.elapsed.total_seconds() * 1000}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
         return {"status": "unhealthy", "error": "unknown"}
     
-    def check_temporal(self) -> Dict:
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
+    async def check_temporal(self) -> Dict:
         """Check Temporal service health."""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                r = await client.get(f"{self.temporal_url}")
-                return {"status": "healthy" if r.status_code < 500 else "unhealthy"}
+            with PROBE_LATENCY.labels("temporal").time():
+                r = await shared_client().get(f"{self.temporal_url}", timeout=5)
+            return {"status": "healthy" if r.status_code < 500 else "unhealthy"}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
     
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
     def check_database(self) -> Dict:
         """Check database connectivity and health."""
         try:
-            with psycopg.connect(self.db_dsn, connect_timeout=5) as conn:
+            with PROBE_LATENCY.labels("database").time(), psycopg.connect(self.db_dsn, connect_timeout=5) as conn:
                 cur = conn.execute("SELECT 1")
                 cur.fetchone()
                 return {"status": "healthy"}
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
     
-    def check_trading_health(self) -> Dict:
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
+    async def check_trading_health(self) -> Dict:
         """Check trading system health."""
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                # Check preflight
-                r = await client.get(f"{self.gateway_url}/preflight")
-                preflight = r.json() if r.status_code == 200 else {}
-                
-                # Check metrics
-                r = await client.get(f"{self.gateway_url}/metrics")
-                metrics = r.json() if r.status_code == 200 else {}
-                
-                return {
-                    "status": "healthy" if metrics.get("green_to_trade", False) else "degraded",
-                    "preflight": preflight,
-                    "metrics": metrics,
-                }
+            client = shared_client()
+            # Check preflight and metrics
+            with PROBE_LATENCY.labels("trading").time():
+                rp, rm = await asyncio.gather(
+                    client.get(f"{self.gateway_url}/preflight", timeout=10),
+                    client.get(f"{self.gateway_url}/metrics", timeout=10),
+                )
+            preflight = rp.json() if rp.status_code == 200 else {}
+            metrics = rm.json() if rm.status_code == 200 else {}
+            
+            return {
+                "status": "healthy" if metrics.get("green_to_trade", False) else "degraded",
+                "preflight": preflight,
+                "metrics": metrics,
+            }
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
     
+    @_ttl_cached(HEALTH_CHECK_TTL_S)
     def check_positions(self) -> Dict:
         """Check position tracking health."""
         try:
@@ -99,16 +156,26 @@ class HealthMonitor:
         except Exception as e:
             return {"status": "unhealthy", "error": str(e)}
     
-    def full_health_check(self) -> Dict:
+    @_ttl_cached(FULL_HEALTH_TTL_S)
+    async def full_health_check(self) -> Dict:
         """Run complete health check."""
+        # Probes are independent; the blocking DB checks run on worker threads
+        gateway, executor, temporal, database, trading, positions = await asyncio.gather(
+            self.check_gateway(),
+            self.check_executor(),
+            self.check_temporal(),
+            asyncio.to_thread(self.check_database),
+            self.check_trading_health(),
+            asyncio.to_thread(self.check_positions),
+        )
         return {
             "timestamp": datetime.now().isoformat(),
-            "gateway": self.check_gateway(),
-            "executor": self.check_executor(),
-            "temporal": self.check_temporal(),
-            "database": self.check_database(),
-            "trading": self.check_trading_health(),
-            "positions": self.check_positions(),
+            "gateway": gateway,
+            "executor": executor,
+            "temporal": temporal,
+            "database": database,
+            "trading": trading,
+            "positions": positions,
             "overall_status": "healthy",  # Will be updated based on checks
         }
     
@@ -121,29 +188,47 @@ class HealthMonitor:
         return False
 
 
+def _restart_service(service: str) -> None:
+    """Restart a compose service through the Docker daemon, else the compose CLI."""
+    global _DOCKER
+    if docker is not None:
+        try:
+            if _DOCKER is None:
+                _DOCKER = docker.from_env()
+            # Match on the compose label so the project name doesn't matter
+            containers = _DOCKER.containers.list(
+                all=True, filters={"label": f"com.docker.compose.service={service}"}
+            )
+            if containers:
+                for c in containers:
+                    c.restart(timeout=10)
+                return
+        except docker.errors.DockerException as e:
+            print(f"Docker API restart of {service} failed, using compose CLI: {e}")
+    os.system(f"docker compose -f {COMPOSE_FILE} restart {service}")
+
+
 async def auto_recover():
     """Automatically recover unhealthy services."""
     monitor = HealthMonitor()
-    health = monitor.full_health_check()
+    health = await monitor.full_health_check()
     
     # Check each service and restart if needed
     if monitor.should_restart_service("gateway", health["gateway"]):
         print("Restarting gateway...")
-        # In production, would use docker compose API or similar
-        os.system("docker compose -f infra/docker-compose.yml restart gateway")
+        await asyncio.to_thread(_restart_service, "gateway")
     
     if monitor.should_restart_service("executor", health["executor"]):
         print("Restarting executor...")
-        os.system("docker compose -f infra/docker-compose.yml restart executor")
+        await asyncio.to_thread(_restart_service, "executor")
     
     if monitor.should_restart_service("database", health["database"]):
         print("Restarting database...")
-        os.system("docker compose -f infra/docker-compose.yml restart db")
+        await asyncio.to_thread(_restart_service, "db")
 
 
 if __name__ == "__main__":
-    import asyncio
     monitor = HealthMonitor()
-    health = monitor.full_health_check()
+    health = run_sync(monitor.full_health_check())
     print(health)
 
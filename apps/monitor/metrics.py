@@ -0,0 +1,45 @@
+"""
+Prometheus instruments for the optimizer and health monitor.
+Exported over HTTP when METRICS_PORT is set; no-ops without prometheus_client.
+"""
+
+import os
+from contextlib import nullcontext
+
+try:
+    from prometheus_client import Counter, Histogram, start_http_server
+except ImportError:  # prometheus_client is optional; instruments become no-ops
+    Counter = Histogram = start_http_server = None
+
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+
+class _Noop:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def time(self):
+        return nullcontext()
+
+    def inc(self, amount: float = 1):
+        pass
+
+
+if Histogram is not None:
+    DB_LATENCY = Histogram("mt_optimizer_db_seconds", "Optimizer DB call time", ["query"])
+    PROBE_LATENCY = Histogram("mt_health_probe_seconds", "Health probe time (HTTP and DB)", ["svc"])
+    CHECK_CACHE = Counter("mt_health_check_cache_total", "Health check cache lookups", ["check", "result"])
+else:
+    DB_LATENCY = PROBE_LATENCY = CHECK_CACHE = _Noop()
+
+_started = False
+
+
+def start_metrics_server() -> None:
+    """Serve /metrics on METRICS_PORT once per process (no-op when unset)."""
+    global _started
+    if _started or not METRICS_PORT or start_http_server is None:
+        return
+    start_http_server(METRICS_PORT)
+    _started = True
@@ -1,24 +1,80 @@
-import os, time, httpx, feedparser
-from bs4 import BeautifulSoup
+import os, time, asyncio, httpx, feedparser
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from libs.http import shared_client, run as run_sync
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional; fall back to BeautifulSoup
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
+    from bs4 import FeatureNotFound
+
+    # Prefer the C-backed lxml tree builder when it is installed
+    try:
+        BeautifulSoup("", "lxml")
+        _BS4_PARSER = "lxml"
+    except FeatureNotFound:
+        _BS4_PARSER = "html.parser"
 
 
 TIMEOUT = float(os.getenv("RAG_TIMEOUT_S", "6"))
 MAX_DOCS = int(os.getenv("RAG_MAX_DOCS", "8"))
+FEED_META_TTL_S = float(os.getenv("RAG_FEED_META_TTL_S", "86400"))
+COLLECT_TTL_S = float(os.getenv("RAG_COLLECT_TTL_S", "60"))
+COLLECT_CACHE_MAX = 64
+# Opt-in: >1 parses feeds in that many spawned processes instead of a thread
+PARSE_WORKERS = int(os.getenv("RAG_PARSE_WORKERS", "1"))
+
+# url -> {"etag", "modified", "entries", "ts"} from the last full fetch of each feed
+_FEED_META: dict[str, dict] = {}
+
+# (query, rss sources, http sources) -> (docs, expires_at), least recently used first
+_COLLECTED: dict[tuple, tuple[list, float]] = {}
+COLLECT_CACHE_STATS = {"hits": 0, "misses": 0}
+
+_PARSE_POOL: ProcessPoolExecutor | None = None
+
+
+def _parse_pool() -> ProcessPoolExecutor | None:
+    # feedparser is pure Python and holds the GIL, so threads can't parse
+    # feeds in parallel; with more than one core, hand them to processes
+    global _PARSE_POOL
+    if PARSE_WORKERS <= 1:
+        return None
+    if _PARSE_POOL is None:
+        # spawn: the parent runs pools and event loops that must not be forked
+        _PARSE_POOL = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _PARSE_POOL
+
+
+def shutdown_parse_pool() -> None:
+    global _PARSE_POOL
+    if _PARSE_POOL is not None:
+        _PARSE_POOL.shutdown(cancel_futures=True)
+        _PARSE_POOL = None
 
 
 def _norm_text(html: str) -> str:
-    soup = BeautifulSoup(html or "", "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    return " ".join(soup.get_text(" ").split())
+    if LexborHTMLParser is None:
+        soup = BeautifulSoup(html or "", _BS4_PARSER)
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        return " ".join(soup.get_text(" ").split())
+    if not html:
+        return ""
+    # C parser (lexbor); same text as the BeautifulSoup path, ~10x faster
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(["script", "style", "noscript"])
+    root = tree.root
+    return " ".join(root.text(separator=" ").split()) if root is not None else ""
 
 
-def _http_get(url: str) -> dict:
-    with httpx.Client(timeout=TIMEOUT, follow_redirects=True) as c:
-        r = c.get(url)
-        r.raise_for_status()
-        text = r.text
+async def _http_get(c: httpx.AsyncClient, url: str) -> dict:
+    r = await c.get(url, timeout=TIMEOUT, follow_redirects=True)
+    r.raise_for_status()
+    text = r.text
     return {
         "url": url,
         "title": None,
@@ -28,9 +84,9 @@ def _http_get(url: str) -> dict:
     }
 
 
-def _rss_get(url: str) -> list:
+def _rss_entries(url: str, content: bytes) -> list:
     out = []
-    feed = feedparser.parse(url)
+    feed = feedparser.parse(content)
     for e in feed.entries[:MAX_DOCS]:
         title = e.get("title") or ""
         link = e.get("link") or url
@@ -52,30 +108,76 @@ def _rss_get(url: str) -> list:
     return out
 
 
-def collect(query: str | None = None, horizon_minutes: int = 60) -> list[dict]:
-    docs = []
+async def _rss_get(c: httpx.AsyncClient, url: str) -> list:
+    now = time.monotonic()
+    meta = _FEED_META.get(url)
+    if meta is not None and now - meta["ts"] > FEED_META_TTL_S:
+        del _FEED_META[url]
+        meta = None
+    # Conditional GET: an unchanged feed answers 304 with no body to parse
+    headers = {}
+    if meta is not None:
+        if meta["etag"]:
+            headers["If-None-Match"] = meta["etag"]
+        if meta["modified"]:
+            headers["If-Modified-Since"] = meta["modified"]
+    r = await c.get(url, headers=headers, timeout=TIMEOUT, follow_redirects=True)
+    if r.status_code == 304 and meta is not None:
+        return [dict(d) for d in meta["entries"]]
+    r.raise_for_status()
+    # feedparser and HTML stripping are CPU-bound; keep them off the event loop
+    pool = _parse_pool()
+    if pool is None:
+        out = await asyncio.to_thread(_rss_entries, url, r.content)
+    else:
+        out = await asyncio.get_running_loop().run_in_executor(pool, _rss_entries, url, r.content)
+    etag, modified = r.headers.get("etag"), r.headers.get("last-modified")
+    if etag or modified:
+        _FEED_META[url] = {"etag": etag, "modified": modified, "entries": out, "ts": now}
+    return [dict(d) for d in out]
+
+
+async def collect_async(query: str | None = None, horizon_minutes: int = 60) -> list[dict]:
     rss = [s.strip() for s in os.getenv("RAG_RSS_SOURCES", "").split(",") if s.strip()]
     http = [s.strip() for s in os.getenv("RAG_HTTP_SOURCES", "").split(",") if s.strip()]
-    for u in rss:
-        try:
-            docs.extend(_rss_get(u))
-        except Exception:
-            continue
-        if len(docs) >= MAX_DOCS:
-            break
-    for u in http:
-        if len(docs) >= MAX_DOCS:
-            break
-        try:
-            docs.append(_http_get(u))
-        except Exception:
-            continue
-    seen, unique = set(), []
-    for d in docs:
-        if d["url"] in seen:
+    key = (query, tuple(rss), tuple(http))
+    now = time.monotonic()
+    hit = _COLLECTED.pop(key, None)
+    if hit is not None and hit[1] > now:
+        COLLECT_CACHE_STATS["hits"] += 1
+        _COLLECTED[key] = hit
+        return [dict(d) for d in hit[0]]
+    COLLECT_CACHE_STATS["misses"] += 1
+    docs = await _collect(rss, http)
+    if len(_COLLECTED) >= COLLECT_CACHE_MAX:
+        del _COLLECTED[next(iter(_COLLECTED))]
+    # Never hold results longer than the caller's horizon
+    _COLLECTED[key] = (docs, now + min(COLLECT_TTL_S, horizon_minutes * 60))
+    return [dict(d) for d in docs]
+
+
+async def _collect(rss: list[str], http: list[str]) -> list[dict]:
+    # Fetch every source at once over the pooled client; wall time is the
+    # slowest source, not the sum, and warm connections skip the TLS handshake
+    c = shared_client()
+    results = await asyncio.gather(
+        *(_rss_get(c, u) for u in rss),
+        *(_http_get(c, u) for u in http),
+        return_exceptions=True,
+    )
+    # Assemble in source order, keeping the first doc per URL and stopping at MAX_DOCS
+    unique: dict[str, dict] = {}
+    for res in results:
+        if isinstance(res, BaseException):
             continue
-        seen.add(d["url"])
-        unique.append(d)
-    return unique[:MAX_DOCS]
+        # RSS sources yield a list of entries, HTTP sources a single page
+        for d in res if isinstance(res, list) else (res,):
+            unique.setdefault(d["url"], d)
+            if len(unique) >= MAX_DOCS:
+                return list(unique.values())
+    return list(unique.values())
 
 
+def collect(query: str | None = None, horizon_minutes: int = 60) -> list[dict]:
+    # Sync entry point for callers without a running event loop
+    return run_sync(collect_async(query, horizon_minutes))
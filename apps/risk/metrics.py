@@ -1,6 +1,18 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 
+import math
 
+import numpy as np
+
+from libs.jit import njit, warmup
+
+
+# reassoc/contract let the reductions vectorize and use FMA while keeping
+# IEEE NaN/inf handling; results equal the plain-Python path within FP tolerance
+_FASTMATH = {"reassoc", "contract"}
+
+
+@njit(cache=True, fastmath=_FASTMATH)
 def compute_fractional_kelly(edge: float, variance: float, k_cap: float, equity: float) -> float:
     if variance <= 0:
         return 0.0
@@ -16,16 +28,61 @@ def update_ath_metrics(prev_equity: float, prev_hwm: float, prev_mdd: float, equ
     return hwm, mdd, romad, gain
 
 
-def deflated_sharpe_ratio(returns: List[float]) -> float:
-    # Placeholder: return simple Sharpe-like scaled; replace with robust DSR later
-    if not returns:
-        return 0.0
-    n = len(returns)
-    mean = sum(returns) / n
-    var = sum((r - mean) ** 2 for r in returns) / n
+def update_ath_metrics_series(
+    equity: Union[List[float], np.ndarray],
+    prev_equity: Optional[float] = None,
+    prev_hwm: Optional[float] = None,
+    prev_mdd: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """update_ath_metrics applied along a whole equity curve.
+
+    Same values as folding the scalar update over `equity` starting from
+    (prev_equity, prev_hwm, prev_mdd), which default to a fresh start at
+    equity[0]. Returns arrays of (hwm, mdd, romad, gain).
+    """
+    e = np.asarray(equity, dtype=np.float64)
+    if e.size == 0:
+        return e.copy(), e.copy(), e.copy(), e.copy()
+    if prev_equity is None:
+        prev_equity = float(e[0])
+    if prev_hwm is None:
+        prev_hwm = prev_equity
+    hwm = np.maximum.accumulate(e)
+    np.maximum(hwm, prev_hwm, out=hwm)
+    mdd = np.maximum.accumulate(hwm - e)
+    np.maximum(mdd, prev_mdd, out=mdd)
+    gain = np.diff(e, prepend=prev_equity)
+    # Each step's ROMAD reads the previous step's hwm/mdd
+    prev_floor = np.empty_like(e)
+    prev_floor[0] = prev_hwm - prev_mdd
+    prev_floor[1:] = hwm[:-1] - mdd[:-1]
+    romad = (e - prev_floor) / np.where(mdd > 0, mdd, 1.0)
+    return hwm, mdd, romad, gain
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _dsr_core(a):
+    n = a.shape[0]
+    s = 0.0
+    for i in range(n):
+        s += a[i]
+    mean = s / n
+    var = 0.0
+    for i in range(n):
+        d = a[i] - mean
+        var += d * d
+    var /= n
     if var <= 0:
         return 0.0
-    sharpe = mean / (var ** 0.5)
-    return max(0.0, sharpe * 0.8)
+    return max(0.0, mean / math.sqrt(var) * 0.8)
+
+
+def deflated_sharpe_ratio(returns: Union[List[float], np.ndarray]) -> float:
+    # Placeholder: return simple Sharpe-like scaled; replace with robust DSR later
+    if len(returns) == 0:
+        return 0.0
+    return float(_dsr_core(np.asarray(returns, dtype=np.float64)))  # no copy when already float64
 
 
+warmup(compute_fractional_kelly, 0.0, 1.0, 1.0, 1.0)
+warmup(_dsr_core, np.zeros(2))
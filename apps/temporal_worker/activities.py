@@ -1,72 +1,198 @@
 from temporalio import activity
-import psycopg, hashlib, re, json
+import hashlib
+from . import db
 from .c2pa_utils import c2pa_inspect
 from apps.executor.utils.market_data import get_latest_close_http
 from apps.executor.utils.exchange_rules import get_exchange_info, _symbol_info, validate_order_filters
 from apps.risk.metrics import compute_fractional_kelly, update_ath_metrics, deflated_sharpe_ratio
 from apps.attention.aslf import aslf_score
 import os
-from apps.rag.collector import collect as rag_collect
+from apps.rag.collector import collect_async as rag_collect
 from apps.executor.impact import choose_strategy
 from apps.science.experiments import BanditDecision
 from apps.models.worldmodel import probability_drawdown_exceeds
+from apps.analytics.positions import open_position
 import time
+import asyncio
+import logging
+import random
+import httpx
+import numpy as np
+import orjson
+from psycopg.types.json import Jsonb
+from libs.http import shared_client
+
+
+EVIDENCE_FETCH_CONCURRENCY = int(os.getenv("EVIDENCE_FETCH_CONCURRENCY", "20"))
+ALLOWED_SYMBOLS = frozenset(t.strip() for t in os.getenv("ALLOWED_SYMBOLS", "").split(",") if t.strip())
+EVIDENCE_CACHE_TTL_S = float(os.getenv("EVIDENCE_CACHE_TTL_S", "300"))
+EVIDENCE_CACHE_MAX = 1024
+# Tunables are read once at import; activities run on every proposal
+_kelly_max = os.getenv("FRACTIONAL_KELLY_MAX")
+FRACTIONAL_KELLY_MAX = float(_kelly_max) if _kelly_max else None
+PROMOTE_PROB_THRESHOLD = float(os.getenv("PROMOTE_PROB_THRESHOLD", "0.8"))
+PROBE_SIZE_BPS = float(os.getenv("PROBE_SIZE_BPS", "3"))
+SIM_DD_LIMIT_BPS = float(os.getenv("SIM_DD_LIMIT_BPS", "300"))
+BINANCE_BASE = os.getenv("BINANCE_BASE", "https://api.binance.com")
+# Friction mirror tried before BINANCE_BASE for klines
+SIM_KLINE_BASES = tuple(b for b in (os.getenv("BINANCE_FRICTION_BASE"), BINANCE_BASE) if b)
+IMPACT_MAX_SLIPPAGE_BPS = float(os.getenv("IMPACT_MAX_SLIPPAGE_BPS", "15"))
+ASLF_NOTIONAL_TEST = float(os.getenv("ASLF_NOTIONAL_TEST", "25"))
+ASLF_THETA_BUY = float(os.getenv("ASLF_THETA_BUY", "1.2"))
+ASLF_THETA_FADE = float(os.getenv("ASLF_THETA_FADE", "-1.2"))
+EXECUTOR_MODE = os.getenv("EXECUTOR_MODE", "live").lower()
+SLICE_INTERVAL_S = float(os.getenv("SLICE_INTERVAL_S", "1"))
+
+
+def _dumps(obj) -> bytes:
+    # numpy scalars encode as plain numbers
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _jsonb(obj) -> Jsonb:
+    # Sent typed as jsonb, so the column needs no text cast
+    return Jsonb(obj, dumps=_dumps)
+
+
+# url -> expires_at of its last passing verification (artifact row already stored)
+_VERIFIED: dict = {}
+EVIDENCE_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _mark_verified(urls) -> None:
+    now = time.monotonic()
+    if len(_VERIFIED) >= EVIDENCE_CACHE_MAX:
+        for k in [k for k, exp in _VERIFIED.items() if exp <= now]:
+            del _VERIFIED[k]
+        if len(_VERIFIED) >= EVIDENCE_CACHE_MAX:
+            _VERIFIED.clear()
+    for u in urls:
+        _VERIFIED[u] = now + EVIDENCE_CACHE_TTL_S
+
+
+async def _fetch_evidence(urls, headers=None):
+    # Fetch every URL at once (bounded, to stay polite to sources); wall
+    # time is the slowest URL rather than the sum
+    c = shared_client()
+    sem = asyncio.Semaphore(EVIDENCE_FETCH_CONCURRENCY)
+    headers = headers or [None] * len(urls)
+
+    async def fetch(url, h):
+        async with sem:
+            return await c.get(url, headers=h, timeout=15)
+
+    return await asyncio.gather(*(fetch(u, h) for u, h in zip(urls, headers)), return_exceptions=True)
+
+
+def _normalize_and_hash(r) -> tuple[int, str]:
+    # (length, sha256) of the whitespace-collapsed body; runs on a worker thread.
+    # split() breaks on exactly the characters r"\s" matches, so this equals
+    # re.sub(r"\s+", " ", text).strip() and stored hashes still match
+    b = " ".join(r.text.split()).encode()
+    return len(b), hashlib.sha256(b).hexdigest()
+
+
+async def _hash_all(responses):
+    # Decode/regex/hash off the event loop; hashlib releases the GIL on large inputs
+    return await asyncio.gather(*(asyncio.to_thread(_normalize_and_hash, r) for r in responses))
 
 
 @activity.defn
 async def verify_evidence(evidence):
-    import httpx
-    async with httpx.AsyncClient(timeout=15) as c:
-        with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-            for ev in evidence:
-                url = ev["url"]
-                r = await c.get(url)
-                if r.status_code != 200:
-                    return False
-                text = r.text
-                norm = re.sub(r"\s+", " ", text).strip()
-                b = norm.encode()
-                sha = hashlib.sha256(b).hexdigest()
-                c2 = c2pa_inspect(r.headers.get("content-type", ""), r.content)
-                if len(b) < 1024 or c2 == "invalid":
-                    return False
-                conn.execute(
-                    "insert into evidence_artifacts(url, sha256, c2pa_status, bytes_len) values (%s,%s,%s,%s)",
-                    (url, sha, c2, len(b)),
+    urls = [ev["url"] for ev in evidence]
+    # URLs that passed within EVIDENCE_CACHE_TTL_S are not fetched again;
+    # repeat proposals tend to cite the same sources
+    now = time.monotonic()
+    todo = [u for u in dict.fromkeys(urls) if _VERIFIED.get(u, 0.0) <= now]
+    EVIDENCE_CACHE_STATS["hits"] += len(urls) - len(todo)
+    EVIDENCE_CACHE_STATS["misses"] += len(todo)
+    fetched = dict(zip(todo, await _fetch_evidence(todo)))
+    # Same verdict and rows as checking one by one: stop at the first bad item
+    head, stop = [], None
+    for url in urls:
+        if url not in fetched:
+            continue
+        r = fetched.pop(url)
+        if isinstance(r, BaseException) or r.status_code != 200:
+            stop = r
+            break
+        head.append((url, r))
+    rows, ok, err = [], True, None
+    for (url, r), (blen, sha) in zip(head, await _hash_all([r for _, r in head])):
+        c2 = c2pa_inspect(r.headers.get("content-type", ""), r.content)
+        if blen < 1024 or c2 == "invalid":
+            ok = False
+            break
+        rows.append((url, sha, c2, blen, r.headers.get("etag"), r.headers.get("last-modified")))
+    else:
+        err = stop if isinstance(stop, BaseException) else None
+        ok = stop is None
+    # Items that passed before the failure keep their rows, as when each was
+    # committed before the next fetch; a transport error re-raises after
+    if rows:
+        async with db.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    "insert into evidence_artifacts(url, sha256, c2pa_status, bytes_len, etag, last_modified) values (%s,%s,%s,%s,%s,%s)",
+                    rows,
                 )
-                conn.commit()
-    return True
+        _mark_verified(row[0] for row in rows)
+    if err is not None:
+        raise err
+    return ok
+
+
+async def _latest_evidence(urls):
+    # url -> (sha256, etag, last_modified) of the newest stored artifact
+    async with db.connection() as conn:
+        cur = await conn.execute(
+            "select distinct on (url) url, sha256, etag, last_modified from evidence_artifacts"
+            " where url = any(%s) order by url, created_at desc",
+            (urls,),
+        )
+        return {row[0]: row[1:] for row in await cur.fetchall()}
+
+
+def _conditional_headers(stored):
+    if stored is None:
+        return None
+    _, etag, last_modified = stored
+    h = {}
+    if etag:
+        h["If-None-Match"] = etag
+    if last_modified:
+        h["If-Modified-Since"] = last_modified
+    return h or None
 
 
 @activity.defn
 async def reverify_evidence(evidence):
     # re-fetch and ensure hash matches stored value
-    import httpx
-    async with httpx.AsyncClient(timeout=15) as c:
-        with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-            for ev in evidence:
-                url = ev["url"]
-                prev = conn.execute("select sha256 from evidence_artifacts where url=%s order by created_at desc limit 1", (url,)).fetchone()
-                if not prev:
-                    return False
-                r = await c.get(url)
-                if r.status_code != 200:
-                    return False
-                norm = re.sub(r"\s+", " ", r.text).strip().encode()
-                sha = hashlib.sha256(norm).hexdigest()
-                if sha != prev[0]:
-                    return False
-    return True
+    urls = [ev["url"] for ev in evidence]
+    # Conditional GETs against the stored validators: an unchanged source
+    # answers 304 with no body, which needs no hashing. Sources without
+    # validators fall back to a full fetch and hash.
+    prev = await _latest_evidence(urls)
+    responses = await _fetch_evidence(urls, [_conditional_headers(prev.get(u)) for u in urls])
+    head, stop = [], None
+    for url, r in zip(urls, responses):
+        if url not in prev or isinstance(r, BaseException) or r.status_code not in (200, 304):
+            stop = r if url in prev else None
+            break
+        head.append((url, r))
+    changed = [(url, r) for url, r in head if r.status_code == 200]
+    for (url, _), (_, sha) in zip(changed, await _hash_all([r for _, r in changed])):
+        if sha != prev[url][0]:
+            return False
+    if isinstance(stop, BaseException):
+        raise stop
+    return len(head) == len(urls)
 
 
 @activity.defn
 async def compute_counterfactual(symbol: str, entry_price: float) -> dict:
-    # Public price fetch and simple delta pnl
-    import httpx
-    async with httpx.AsyncClient(timeout=10) as c:
-        r = await c.get(f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval=1m&limit=1")
-        r.raise_for_status()
-        close = float(r.json()[0][4])
+    # Public price fetch (shares the cached/coalesced latest close) and simple delta pnl
+    close = await get_latest_close_http(symbol, "1m")
     pnl_trade = close - entry_price
     pnl_no_trade = 0.0
     return {"mark_price": close, "pnl_trade": pnl_trade, "pnl_no_trade": pnl_no_trade, "counterfactual_delta": pnl_trade - pnl_no_trade}
@@ -77,18 +203,15 @@ async def record_execution(order_id: str, proposal: dict, exec_res: dict):
     body = exec_res.get("body")
     venue = exec_res.get("venue", "binance") or "binance"
     
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        conn.execute(
+    async with db.connection() as conn:
+        await conn.execute(
             "insert into executions(proposal_id, venue, order_id, status, fills, error) values (NULL, %s, %s, %s, %s, %s)",
-            (venue, order_id, str(exec_res.get("code")), json.dumps(body) if body is not None else None, None),
+            (venue, order_id, str(exec_res.get("code")), _jsonb(body) if body is not None else None, None),
         )
-        conn.commit()
     
     # Track position if trade was filled
     if body and exec_res.get("code") in (200, 201):
         try:
-            from apps.analytics.positions import open_position
-            
             symbol = proposal.get("symbol", body.get("symbol", "BTCUSDT"))
             side = proposal.get("side", "buy")
             
@@ -101,7 +224,9 @@ async def record_execution(order_id: str, proposal: dict, exec_res: dict):
                 fees = sum(float(f.get("commission", 0)) for f in fills)
                 
                 if total_qty > 0 and avg_price > 0:
-                    open_position(
+                    # Sync pool call; run it off the event loop so other activities keep going
+                    await asyncio.to_thread(
+                        open_position,
                         symbol=symbol,
                         side=side,
                         base_qty=total_qty,
@@ -113,7 +238,6 @@ async def record_execution(order_id: str, proposal: dict, exec_res: dict):
                     )
         except Exception as e:
             # Log error but don't fail the execution record
-            import logging
             logging.warning(f"Failed to track position: {e}")
     
     return True
@@ -121,31 +245,27 @@ async def record_execution(order_id: str, proposal: dict, exec_res: dict):
 
 @activity.defn
 async def update_postmortem(order_id: str, postmortem: dict):
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        conn.execute(
+    async with db.connection() as conn:
+        await conn.execute(
             "update executions set postmortem = %s where order_id = %s",
-            (json.dumps(postmortem), order_id),
+            (_jsonb(postmortem), order_id),
         )
-        conn.commit()
     return True
 
 
 @activity.defn
 async def validate_venue_rules(proposal: dict) -> bool:
     symbol = proposal["symbol"]
+    # Env allowlist (optional); checked first since it needs no network
+    if ALLOWED_SYMBOLS and symbol not in ALLOWED_SYMBOLS:
+        return False
     price = await get_latest_close_http(symbol, "1m")
-    info = await get_exchange_info()
+    info = await get_exchange_info()  # cached per process after the first call
     s = _symbol_info(info, symbol)
     if not s:
         return False
     ok, _ = validate_order_filters(s, price, quote_qty=20.0)
-    if not ok:
-        return False
-    # Env allowlist (optional)
-    allowlist = [t.strip() for t in os.getenv("ALLOWED_SYMBOLS", "").split(",") if t.strip()]
-    if allowlist and symbol not in allowlist:
-        return False
-    return True
+    return ok
 
 
 @activity.defn
@@ -155,8 +275,8 @@ async def compute_trade_size(proposal: dict, equity_start: float = 10000.0, k_ca
     aslf = float(proposal.get("_aslf", 0.0))
     edge = max(0.0, conf - 0.5) + max(0.0, aslf) * 0.05
     variance = 0.04  # placeholder variance
-    cap_env = float(os.getenv("FRACTIONAL_KELLY_MAX", str(k_cap)))
-    k_cap = min(k_cap, cap_env)
+    if FRACTIONAL_KELLY_MAX is not None:
+        k_cap = min(k_cap, FRACTIONAL_KELLY_MAX)
     # Probe override: convert bps of equity to notional
     if force_probe_bps is not None and force_probe_bps > 0:
         size = equity_start * (force_probe_bps / 1e4)
@@ -169,79 +289,90 @@ async def compute_trade_size(proposal: dict, equity_start: float = 10000.0, k_ca
 async def collect_docs(proposal: dict):
     query = str(proposal.get("thesis") or proposal.get("symbol") or "")
     horizon = int(proposal.get("horizon_minutes", 60))
-    return rag_collect(query, horizon)
+    return await rag_collect(query, horizon)
+
+# hypothesis key -> in-flight prior read; concurrent decisions for a key share one query
+_PRIOR_INFLIGHT: dict = {}
+
+
+async def _load_prior(key: str) -> tuple:
+    # One round-trip: seed the Beta(1,1) prior for a new key, else read the
+    # existing row (without rewriting it, unlike DO UPDATE SET key=key)
+    async with db.connection() as conn:
+        cur = await conn.execute(
+            """
+            with ins as (
+                insert into hypotheses(key,alpha,beta,promoted) values (%(key)s,1,1,false)
+                on conflict (key) do nothing
+                returning alpha,beta,promoted
+            )
+            select alpha,beta,promoted from ins
+            union all
+            select alpha,beta,promoted from hypotheses where key=%(key)s
+            limit 1
+            """,
+            {"key": key},
+        )
+        row = await cur.fetchone()
+    # No row only if another worker inserted the key mid-statement: it holds the prior
+    return (float(row[0]), float(row[1]), bool(row[2])) if row else (1.0, 1.0, False)
+
 
 @activity.defn
 async def bandit_decide(proposal: dict) -> dict:
     key = f"aslf:{proposal.get('symbol','')}"
     # Thompson sampling over Beta(alpha,beta): success=recent HWM hit proxy (not tracked yet) → use prior
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        row = conn.execute("select alpha,beta,promoted from hypotheses where key=%s", (key,)).fetchone()
-        if not row:
-            conn.execute("insert into hypotheses(key,alpha,beta,promoted) values(%s,1,1,false)", (key,))
-            conn.commit()
-            alpha, beta, promoted = 1.0, 1.0, False
-        else:
-            alpha, beta, promoted = float(row[0]), float(row[1]), bool(row[2])
-    import random
+    task = _PRIOR_INFLIGHT.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_load_prior(key))
+        _PRIOR_INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _PRIOR_INFLIGHT.pop(key, None) if _PRIOR_INFLIGHT.get(key) is t else None)
+    # Each caller still draws its own sample from the shared prior
+    alpha, beta, promoted = await asyncio.shield(task)
     sample = random.betavariate(alpha, beta)
-    # Promotion threshold + probe bps from env
-    promote_threshold = float(os.getenv("PROMOTE_PROB_THRESHOLD", "0.8"))
-    probe_bps = float(os.getenv("PROBE_SIZE_BPS", "3"))
     # Map sample to size multiplier in [0.05, 1.0]; cap for probes until promoted
-    max_mult = 0.25 if (not promoted and sample < promote_threshold) else 1.0
+    max_mult = 0.25 if (not promoted and sample < PROMOTE_PROB_THRESHOLD) else 1.0
     mult = max(0.05, min(max_mult, sample))
-    is_probe = (not promoted and sample < promote_threshold)
-    return {"status": "promoted" if not is_probe else "probe", "size_multiplier": mult, "key": key, "is_probe": is_probe, "probe_bps": probe_bps}
+    is_probe = (not promoted and sample < PROMOTE_PROB_THRESHOLD)
+    return {"status": "promoted" if not is_probe else "probe", "size_multiplier": mult, "key": key, "is_probe": is_probe, "probe_bps": PROBE_SIZE_BPS}
 
 @activity.defn
 async def risk_simulate(proposal: dict) -> dict:
     symbol = proposal.get("symbol","BTCUSDT")
     horizon = int(proposal.get("horizon_minutes", 60))
-    dd_limit_bps = float(os.getenv("SIM_DD_LIMIT_BPS","300"))
     # Pull last 120 closes to estimate returns
-    import httpx
-    bases = []
-    fb = os.getenv("BINANCE_FRICTION_BASE")
-    if fb:
-        bases.append(fb)
-    bases.append(os.getenv("BINANCE_BASE", "https://api.binance.com"))
     data = None
-    async with httpx.AsyncClient(timeout=10) as c:
-        for base in bases:
-            try:
-                r = await c.get(f"{base}/api/v3/klines?symbol={symbol}&interval=1m&limit=120")
-                if r.status_code in (451,403,429):
-                    raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
-                r.raise_for_status()
-                data = r.json()
-                break
-            except Exception:
-                continue
+    c = shared_client()
+    for base in SIM_KLINE_BASES:
+        try:
+            r = await c.get(f"{base}/api/v3/klines?symbol={symbol}&interval=1m&limit=120", timeout=10)
+            if r.status_code in (451,403,429):
+                raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+            r.raise_for_status()
+            data = orjson.loads(r.content)
+            break
+        except Exception:
+            continue
     if data is None:
         return {"ok": True, "prob_dd_exceed": 0.0}  # fail-open for sim if markets unreachable
-    closes = [float(k[4]) for k in data]
-    rets = []
-    for i in range(1,len(closes)):
-        rets.append((closes[i]/closes[i-1])-1.0)
-    prob = probability_drawdown_exceeds(rets, min(horizon,30), dd_limit_bps)
+    closes = np.array([k[4] for k in data], dtype=np.float64)
+    rets = closes[1:] / closes[:-1] - 1.0
+    prob = probability_drawdown_exceeds(rets, min(horizon,30), SIM_DD_LIMIT_BPS)
     return {"ok": prob < 0.5, "prob_dd_exceed": prob}
 
 @activity.defn
 async def choose_execution(proposal: dict, notional: float) -> dict:
     # Reuse market data used by ASLF friction to fetch spread/depth
-    base = os.getenv("BINANCE_BASE", "https://api.binance.com")
-    import httpx
-    async with httpx.AsyncClient(timeout=10) as c:
-        r = await c.get(f"{base}/api/v3/depth?symbol={proposal['symbol']}&limit=5")
-        r.raise_for_status()
-        ob = r.json()
+    r = await shared_client().get(f"{BINANCE_BASE}/api/v3/depth?symbol={proposal['symbol']}&limit=5", timeout=10)
+    r.raise_for_status()
+    ob = orjson.loads(r.content)
     best_bid = float(ob["bids"][0][0]); best_ask = float(ob["asks"][0][0])
-    spread_bps = (best_ask - best_bid) / ((best_ask + best_bid) / 2) * 1e4
-    depth_ratio = sum(float(q) for _,q in ob["bids"][:5]) / max((notional / ((best_ask+best_bid)/2)), 1e-9)
+    mid = (best_ask + best_bid) * 0.5
+    spread_bps = (best_ask - best_bid) / mid * 1e4
+    # Five levels: plain float() beats building an array here
+    depth_ratio = sum(float(q) for _, q in ob["bids"][:5]) / max(notional / mid, 1e-9)
     choice = choose_strategy(spread_bps, depth_ratio, notional)
-    max_slip = float(os.getenv("IMPACT_MAX_SLIPPAGE_BPS", "15"))
-    if choice.get("impact_bps", 0) > max_slip:
+    if choice.get("impact_bps", 0) > IMPACT_MAX_SLIPPAGE_BPS:
         # Force POV/VWAP if impact too high
         choice["style"] = "POV"
         choice["slices"] = max(5, choice.get("slices", 5))
@@ -260,12 +391,11 @@ async def attribute_trade(order: dict, context: dict) -> bool:
         status = "mock_filled"
     elif 200 <= code < 300:
         status = "filled"
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        conn.execute(
+    async with db.connection() as conn:
+        await conn.execute(
             "insert into trade_attribution(order_id,symbol,mechanism,aslf,execution_style,impact_bps,notes,status) values (%s,%s,%s,%s,%s,%s,%s,%s)",
             (order_id, symbol, "aslf", context.get("aslf"), context.get("style"), context.get("impact_bps"), context.get("notes",""), status),
         )
-        conn.commit()
     return True
 
 @activity.defn
@@ -274,46 +404,52 @@ async def record_hypothesis_outcome(exec_ctx: dict) -> bool:
     symbol = exec_ctx.get("symbol") or exec_ctx.get("body", {}).get("symbol") or "BTCUSDT"
     status = (exec_ctx.get("status") or "").lower()
     key = f"aslf:{symbol}"
-    promote_threshold = float(os.getenv("PROMOTE_PROB_THRESHOLD", "0.8"))
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        row = conn.execute("select alpha,beta,promoted from hypotheses where key=%s", (key,)).fetchone()
-        if not row:
-            alpha, beta, promoted = 1.0, 1.0, False
-            conn.execute("insert into hypotheses(key,alpha,beta,promoted) values (%s,%s,%s,%s)", (key, alpha, beta, promoted))
-        else:
-            alpha, beta, promoted = float(row[0]), float(row[1]), bool(row[2])
-        if status in ("filled","mock_filled"):
-            alpha += 1.0
-        else:
-            beta += 1.0
-        pmean = alpha / max(1.0, (alpha + beta))
-        promoted = promoted or (pmean >= promote_threshold)
-        conn.execute("update hypotheses set alpha=%s,beta=%s,promoted=%s,updated_at=now() where key=%s", (alpha, beta, promoted, key))
-        conn.commit()
+    win = 1.0 if status in ("filled","mock_filled") else 0.0
+    # One upsert instead of select + insert/update: a new key starts from the
+    # Beta(1,1) prior, and concurrent outcomes for a key can't lose updates
+    async with db.connection() as conn:
+        await conn.execute(
+            """
+            insert into hypotheses as h (key, alpha, beta, promoted, updated_at)
+            values (%(key)s, 1 + %(win)s, 1 + %(loss)s, (1 + %(win)s) / 3.0 >= %(thr)s, now())
+            on conflict (key) do update set
+                alpha = h.alpha + %(win)s,
+                beta = h.beta + %(loss)s,
+                promoted = h.promoted or (h.alpha + %(win)s) / greatest(1.0, h.alpha + h.beta + 1) >= %(thr)s,
+                updated_at = now()
+            """,
+            {"key": key, "win": win, "loss": 1.0 - win, "thr": PROMOTE_PROB_THRESHOLD},
+        )
     return True
 
 @activity.defn
-async def compute_aslf_activity(proposal: dict) -> dict:
+async def compute_aslf_activity(proposal: dict, record: bool = True) -> dict:
     symbol = proposal["symbol"]
-    notional =  float(os.getenv("ASLF_NOTIONAL_TEST", "25"))
-    res = await aslf_score(symbol, notional)
-    theta_buy = float(os.getenv("ASLF_THETA_BUY", "1.2"))
-    theta_fade = float(os.getenv("ASLF_THETA_FADE", "-1.2"))
-    decision = "allow" if res["aslf"] >= theta_buy else ("fade" if res["aslf"] <= theta_fade else "deny")
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        conn.execute(
+    res = await aslf_score(symbol, ASLF_NOTIONAL_TEST)
+    decision = "allow" if res["aslf"] >= ASLF_THETA_BUY else ("fade" if res["aslf"] <= ASLF_THETA_FADE else "deny")
+    res = {**res, "decision": decision}
+    # Callers scoring before the evidence verdict pass record=False and write
+    # the row with record_aslf once the proposal has passed
+    if record:
+        await record_aslf(symbol, res)
+    return res
+
+
+@activity.defn
+async def record_aslf(symbol: str, res: dict) -> None:
+    async with db.connection() as conn:
+        await conn.execute(
             "insert into attention_aslf(symbol, aas, lmf, aslf, decision, notes) values (%s,%s,%s,%s,%s,%s)",
-            (symbol, res["aas"], res["lmf"], res["aslf"], decision, f"spread_bps={res['spread_bps']:.2f};depth={res['depth_ratio']:.2f}"),
+            (symbol, res["aas"], res["lmf"], res["aslf"], res["decision"], f"spread_bps={res['spread_bps']:.2f};depth={res['depth_ratio']:.2f}"),
         )
-        conn.commit()
-    return {**res, "decision": decision}
 
 
 @activity.defn
 async def update_equity_stats(symbol: str, entry_price: float | None = None):
     latest = await get_latest_close_http(symbol, "1m")
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        row = conn.execute("select equity, high_water_mark, max_drawdown from equity_stats order by ts desc limit 1").fetchone()
+    async with db.connection() as conn:
+        cur = await conn.execute("select equity, high_water_mark, max_drawdown from equity_stats order by ts desc limit 1")
+        row = await cur.fetchone()
         prev_equity = float(row[0]) if row else 10000.0
         prev_hwm = float(row[1]) if row else prev_equity
         prev_mdd = float(row[2]) if row else 0.0
@@ -323,34 +459,27 @@ async def update_equity_stats(symbol: str, entry_price: float | None = None):
             realized = latest - entry_price
         equity_t = prev_equity + realized
         hwm, mdd, romad, _ = update_ath_metrics(prev_equity, prev_hwm, prev_mdd, equity_t)
-        conn.execute(
+        await conn.execute(
             "insert into equity_stats(equity, high_water_mark, max_drawdown, romad, notes) values (%s,%s,%s,%s,%s)",
             (equity_t, hwm, mdd, romad, f"mark {latest}"),
         )
-        conn.commit()
     return {"equity": equity_t, "high_water_mark": hwm, "max_drawdown": mdd, "romad": romad}
 
 
 @activity.defn
 async def gate_policy(proposal: dict):
-    with psycopg.connect("dbname=mastertrader user=trader password=traderpw host=db") as conn:
-        enabled = conn.execute("select trading_enabled from policy_flags where id=1").fetchone()[0]
+    async with db.connection() as conn:
+        cur = await conn.execute("select trading_enabled from policy_flags where id=1")
+        enabled = (await cur.fetchone())[0]
     if not enabled:
         return False
     return True
 
 
-@activity.defn
-async def call_executor(params: dict):
-    # Heartbeat once at start for visibility on long calls
-    try:
-        activity.heartbeat("starting")
-    except Exception:
-        pass
+async def _send_order(params: dict) -> dict:
     proposal = params["proposal"]
     # Mock mode for proof runs
-    mode = os.getenv("EXECUTOR_MODE", "live").lower()
-    if mode == "mock":
+    if EXECUTOR_MODE == "mock":
         price = await get_latest_close_http(proposal["symbol"], "1m")
         q = float(params.get("quote_qty", 20))
         qty = max(1e-9, q / max(price, 1e-9))
@@ -372,10 +501,44 @@ async def call_executor(params: dict):
         "venue": "binance",
         "idempotency_key": params.get("idempotency_key", "wf-" + proposal["symbol"]),
     }
-    import httpx
-    async with httpx.AsyncClient(timeout=15) as c:
-        r = await c.post("http://executor:8001/orders", json=body)
-        return {"code": r.status_code, "body": r.json()}
+    r = await shared_client().post(
+        "http://executor:8001/orders", content=orjson.dumps(body), headers={"Content-Type": "application/json"}, timeout=15
+    )
+    return {"code": r.status_code, "body": orjson.loads(r.content)}
+
+
+@activity.defn
+async def call_executor(params: dict):
+    # Heartbeat once at start for visibility on long calls
+    try:
+        activity.heartbeat("starting")
+    except Exception:
+        pass
+    return await _send_order(params)
+
+
+@activity.defn
+async def call_executor_batch(params: dict) -> list:
+    # All slices of a meta-order in one activity, paced here instead of by
+    # workflow timers. Each finished slice is heartbeated, so a retried
+    # attempt resumes after it rather than resending it.
+    proposal = params["proposal"]
+    slices = int(params.get("slices", 3))
+    info = activity.info()
+    details = info.heartbeat_details
+    results = list(details[0]) if details else []
+    for i in range(len(results), slices):
+        if i:
+            await asyncio.sleep(SLICE_INTERVAL_S)
+            activity.heartbeat(results)
+        results.append(await _send_order({
+            "proposal": proposal,
+            # Unique per meta-order: repeat orders on a symbol must not dedupe
+            "idempotency_key": f"slice-{info.workflow_id}-{i}-{proposal.get('symbol','')}",
+            "quote_qty": params.get("quote_qty", 20),
+        }))
+        activity.heartbeat(results)
+    return results
 
 @activity.defn
 async def postmortem_enqueue(exec_result: dict):
@@ -0,0 +1,31 @@
+import os
+from contextlib import asynccontextmanager
+from psycopg_pool import AsyncConnectionPool
+
+
+PG_DSN = os.getenv("PG_DSN", "dbname=mastertrader user=trader password=traderpw host=db")
+PG_POOL_MIN = int(os.getenv("WORKER_PG_POOL_MIN", "5"))
+PG_POOL_MAX = int(os.getenv("WORKER_PG_POOL_MAX", "50"))
+PG_POOL_TIMEOUT_S = float(os.getenv("PG_POOL_TIMEOUT_S", "5"))
+
+# Shared by every activity in the worker process; opened by worker.main (or on
+# first use) so importing stays side-effect free
+POOL = AsyncConnectionPool(
+    PG_DSN,
+    min_size=PG_POOL_MIN,
+    max_size=PG_POOL_MAX,
+    timeout=PG_POOL_TIMEOUT_S,
+    # Activities send the same few statements over and over; prepare each on
+    # first use so the server parses and plans it once per connection
+    kwargs={"prepare_threshold": 0},
+    open=False,
+)
+
+
+@asynccontextmanager
+async def connection():
+    # Commits on clean exit, rolls back on error
+    if POOL.closed:
+        await POOL.open(wait=False)
+    async with POOL.connection() as conn:
+        yield conn
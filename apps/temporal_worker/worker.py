@@ -1,13 +1,22 @@
 import asyncio
+import os
 from temporalio.client import Client
 from temporalio.worker import Worker
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner, SandboxRestrictions
+from apps.temporal_worker import db
+from apps.temporal_worker.converter import DATA_CONVERTER
+from libs import jit
+from libs.http import aclose_shared_client
+from apps.rag.collector import shutdown_parse_pool
 from apps.temporal_worker.workflows_pure import TraderWorkflow, PostmortemWorkflow, MetaOrderWorkflow
 from apps.temporal_worker.activities import (
     collect_docs,
     verify_evidence,
     compute_aslf_activity,
+    record_aslf,
     gate_policy,
     call_executor,
+    call_executor_batch,
     postmortem_enqueue,
     compute_counterfactual,
     bandit_decide,
@@ -19,9 +28,19 @@ from apps.temporal_worker.activities import (
 )
 
 
+# Activities mostly wait on HTTP/DB, so allow more in flight than the SDK's
+# default of 100; DB work is still bounded by the worker pool size
+MAX_CONCURRENT_ACTIVITIES = int(os.getenv("TEMPORAL_MAX_ACTIVITIES", "200"))
+MAX_CONCURRENT_LOCAL_ACTIVITIES = int(os.getenv("TEMPORAL_MAX_LOCAL_ACTIVITIES", "100"))
+MAX_CONCURRENT_WORKFLOW_TASKS = int(os.getenv("TEMPORAL_MAX_WORKFLOW_TASKS", "100"))
+MAX_CACHED_WORKFLOWS = int(os.getenv("TEMPORAL_MAX_CACHED_WORKFLOWS", "1000"))
+# Workflows reference activity functions only; load them (and their numpy,
+# psycopg, ... imports) once outside the sandbox
+PASSTHROUGH_MODULES = ("apps.temporal_worker.activities",)
+
+
 async def main():
     # Get Temporal address from env or default
-    import os
     temporal_address = os.getenv("TEMPORAL_ADDRESS", "temporal:7233")
     
     print(f"🔄 Starting Temporal worker...")
@@ -34,7 +53,7 @@ async def main():
     while True:
         try:
             print(f"   Attempting connection (attempt {attempt + 1})...")
-            client = await Client.connect(temporal_address)
+            client = await Client.connect(temporal_address, data_converter=DATA_CONVERTER)
             print(f"✅ Connected to Temporal!")
             break
         except Exception as e:
@@ -51,10 +70,26 @@ async def main():
         client,
         task_queue="trader-tq",
         workflows=[TraderWorkflow, PostmortemWorkflow, MetaOrderWorkflow],
-        activities=[collect_docs, verify_evidence, compute_aslf_activity, gate_policy, call_executor, postmortem_enqueue, compute_counterfactual, bandit_decide, risk_simulate, choose_execution, attribute_trade, compute_trade_size, record_hypothesis_outcome],
+        activities=[collect_docs, verify_evidence, compute_aslf_activity, record_aslf, gate_policy, call_executor, call_executor_batch, postmortem_enqueue, compute_counterfactual, bandit_decide, risk_simulate, choose_execution, attribute_trade, compute_trade_size, record_hypothesis_outcome],
+        max_concurrent_activities=MAX_CONCURRENT_ACTIVITIES,
+        max_concurrent_local_activities=MAX_CONCURRENT_LOCAL_ACTIVITIES,
+        max_concurrent_workflow_tasks=MAX_CONCURRENT_WORKFLOW_TASKS,
+        max_cached_workflows=MAX_CACHED_WORKFLOWS,
+        workflow_runner=SandboxedWorkflowRunner(
+            restrictions=SandboxRestrictions.default.with_passthrough_modules(*PASSTHROUGH_MODULES)
+        ),
     )
+    # Open the activities' DB pool before the first task arrives
+    await db.POOL.open(wait=False)
+    # Compile the numba kernels now rather than on the first risk check
+    await asyncio.to_thread(jit.warm)
     print(f"🚀 Worker started! Listening for workflows...")
-    await worker.run()
+    try:
+        await worker.run()
+    finally:
+        await db.POOL.close()
+        await aclose_shared_client()
+        shutdown_parse_pool()
 
 
 if __name__ == "__main__":
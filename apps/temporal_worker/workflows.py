@@ -1,47 +1,34 @@
+import asyncio
 from temporalio import workflow
 from datetime import timedelta
 from apps.temporal_worker.postmortem import PostmortemWorkflow
 
 
+def _result(res):
+    # Re-raise an activity failure collected by gather(return_exceptions=True)
+    if isinstance(res, BaseException):
+        raise res
+    return res
+
+
 @workflow.defn
 class TraderWorkflow:
     @workflow.run
     async def run(self, proposal: dict):
         # Import heavy modules lazily to avoid sandbox import issues
         from apps.temporal_worker import activities as acts
-        ok = await workflow.execute_activity(
-            acts.verify_evidence,
-            proposal["evidence"],
-            start_to_close_timeout=30,
-            retry_policy=workflow.RetryPolicy(maximum_attempts=3),
-        )
+        if workflow.patched("trader-concurrent-gates"):
+            ok, gated, aslf, rules_ok = await self._gates_concurrent(acts, proposal)
+        else:
+            # Executions started before the patch replay the sequential checks;
+            # drop this branch once they have drained
+            ok, gated, aslf, rules_ok = await self._gates_sequential(acts, proposal)
         if not ok:
             return {"status": "rejected", "reason": "evidence_failed"}
-
-        gated = await workflow.execute_activity(
-            acts.gate_policy,
-            proposal,
-            start_to_close_timeout=10,
-            retry_policy=workflow.RetryPolicy(maximum_attempts=3),
-        )
         if not gated:
             return {"status": "rejected", "reason": "policy_denied"}
-
-        # ASLF attention/liquidity gate
-        aslf = await workflow.execute_activity(
-            acts.compute_aslf_activity,
-            proposal,
-            start_to_close_timeout=20,
-        )
         if aslf.get("decision") != "allow":
             return {"status": "rejected", "reason": "aslf_denied", "aslf": aslf}
-
-        # Venue rules pre-check
-        rules_ok = await workflow.execute_activity(
-            acts.validate_venue_rules,
-            proposal,
-            start_to_close_timeout=15,
-        )
         if not rules_ok:
             return {"status": "rejected", "reason": "venue_rules"}
 
@@ -88,4 +75,76 @@ class TraderWorkflow:
             await workflow.start_child_workflow(PostmortemWorkflow.run, proposal.get("symbol", "BTCUSDT"), entry_price, int(proposal.get("horizon_minutes", 1)), idem)
         return {"status": "submitted", "execution": exec_res}
 
+    async def _gates_concurrent(self, acts, proposal: dict):
+        # The pre-trade checks don't depend on each other: run them together,
+        # then judge them in the original order so the first failure wins
+        ok, gated, aslf, rules_ok = await asyncio.gather(
+            workflow.execute_activity(
+                acts.verify_evidence,
+                proposal["evidence"],
+                start_to_close_timeout=30,
+                retry_policy=workflow.RetryPolicy(maximum_attempts=3),
+            ),
+            workflow.execute_activity(
+                acts.gate_policy,
+                proposal,
+                start_to_close_timeout=10,
+                retry_policy=workflow.RetryPolicy(maximum_attempts=3),
+            ),
+            # ASLF attention/liquidity gate; scored here, recorded below only
+            # for proposals that passed evidence and policy
+            workflow.execute_activity(
+                acts.compute_aslf_activity,
+                args=[proposal, False],
+                start_to_close_timeout=20,
+            ),
+            # Venue rules pre-check
+            workflow.execute_activity(
+                acts.validate_venue_rules,
+                proposal,
+                start_to_close_timeout=15,
+            ),
+            return_exceptions=True,
+        )
+        if not _result(ok) or not _result(gated):
+            return ok, gated, None, None
+        aslf = _result(aslf)
+        await workflow.execute_activity(
+            acts.record_aslf,
+            args=[proposal["symbol"], aslf],
+            start_to_close_timeout=10,
+        )
+        if aslf.get("decision") != "allow":
+            return ok, gated, aslf, None
+        return ok, gated, aslf, _result(rules_ok)
 
+    async def _gates_sequential(self, acts, proposal: dict):
+        ok = await workflow.execute_activity(
+            acts.verify_evidence,
+            proposal["evidence"],
+            start_to_close_timeout=30,
+            retry_policy=workflow.RetryPolicy(maximum_attempts=3),
+        )
+        if not ok:
+            return ok, None, None, None
+        gated = await workflow.execute_activity(
+            acts.gate_policy,
+            proposal,
+            start_to_close_timeout=10,
+            retry_policy=workflow.RetryPolicy(maximum_attempts=3),
+        )
+        if not gated:
+            return ok, gated, None, None
+        aslf = await workflow.execute_activity(
+            acts.compute_aslf_activity,
+            proposal,
+            start_to_close_timeout=20,
+        )
+        if aslf.get("decision") != "allow":
+            return ok, gated, aslf, None
+        rules_ok = await workflow.execute_activity(
+            acts.validate_venue_rules,
+            proposal,
+            start_to_close_timeout=15,
+        )
+        return ok, gated, aslf, rules_ok
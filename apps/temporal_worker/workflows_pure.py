@@ -1,81 +1,156 @@
+import asyncio
 from temporalio import workflow
 from typing import Any, Dict, Optional
 from datetime import timedelta
+from temporalio.common import RetryPolicy
+
+# The worker's sandbox passes this module through (PASSTHROUGH_MODULES in
+# worker.py), so it loads once rather than inside each workflow run. Keep the
+# dotted form: the sandbox matches passthrough names on the imported module,
+# and "from apps.temporal_worker import activities" would miss it
+import apps.temporal_worker.activities as acts
+
+# Most failures here are transient HTTP/DB errors: retry fast, and give up
+# after a few attempts rather than retrying forever (the SDK default)
+_RETRY = RetryPolicy(
+    initial_interval=timedelta(milliseconds=100),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(seconds=2),
+    maximum_attempts=3,
+)
+
+
+def _result(res):
+    # Re-raise an activity failure collected by gather(return_exceptions=True)
+    if isinstance(res, BaseException):
+        raise res
+    return res
+
+
+# Used for empty/manual starts. Never mutated: the workflow only reads the
+# proposal and derives new dicts from it, so it is shared without copying
+_STUB_PROPOSAL = {
+    "action": "open",
+    "symbol": "BTCUSDT",
+    "side": "buy",
+    "size_bps_equity": 4.0,
+    "horizon_minutes": 120,
+    "thesis": "stub",
+    "risk": {"stop_loss_bps": 60, "take_profit_bps": 120, "max_slippage_bps": 3},
+    "evidence": [{"url": "https://www.binance.com/en/support/announcement", "type": "exchange_status"}],
+    "confidence": 0.7,
+}
+
+
+# workflow.patched() ids: executions started before a change replay the old
+# command sequence. Drop the old branch once those executions have drained.
+_PATCH_CONCURRENT_GATES = "trader-concurrent-gates"
+_PATCH_BATCH_SLICES = "meta-order-batch-slices"
 
 
 @workflow.defn
 class TraderWorkflow:
     @workflow.run
     async def run(self, proposal: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        with workflow.unsafe.imports_passed_through():
-            from apps.temporal_worker import activities as acts
-
         # Allow empty/manual starts from UI: fall back to a safe stub proposal
         if not proposal:
-            proposal = {
-                "action": "open",
-                "symbol": "BTCUSDT",
-                "side": "buy",
-                "size_bps_equity": 4.0,
-                "horizon_minutes": 120,
-                "thesis": "stub",
-                "risk": {"stop_loss_bps": 60, "take_profit_bps": 120, "max_slippage_bps": 3},
-                "evidence": [{"url": "https://www.binance.com/en/support/announcement", "type": "exchange_status"}],
-                "confidence": 0.7,
-            }
-
-        # Collect docs (RAG)
-        docs = await workflow.execute_activity(
-            acts.collect_docs, proposal, start_to_close_timeout=timedelta(seconds=30)
-        )
+            proposal = _STUB_PROPOSAL
+        if not workflow.patched(_PATCH_CONCURRENT_GATES):
+            return await self._run_sequential(proposal)
 
-        # Verify evidence (provenance + hash/C2PA)
-        ver = await workflow.execute_activity(
-            acts.verify_evidence, proposal.get("evidence", []), start_to_close_timeout=timedelta(seconds=60)
+        # Collect docs (RAG), verify evidence (provenance + hash/C2PA), the ASLF
+        # attention/liquidity score, the risk simulation guard and the execution
+        # style choice read only the proposal and market data; run them together.
+        # Activities that write (ASLF row, bandit prior seed) wait for the verdicts
+        docs, ver, aslf, risk_ok, choice = await asyncio.gather(
+            workflow.execute_activity(
+                acts.collect_docs, proposal, start_to_close_timeout=timedelta(seconds=30),
+                schedule_to_close_timeout=timedelta(seconds=45), retry_policy=_RETRY,
+            ),
+            workflow.execute_activity(
+                acts.verify_evidence, proposal.get("evidence", []), start_to_close_timeout=timedelta(seconds=60),
+                schedule_to_close_timeout=timedelta(seconds=90), retry_policy=_RETRY,
+            ),
+            # Score only; the row is written below once the evidence has passed
+            workflow.execute_activity(
+                acts.compute_aslf_activity, args=[proposal, False], start_to_close_timeout=timedelta(seconds=15), retry_policy=_RETRY
+            ),
+            workflow.execute_activity(acts.risk_simulate, proposal, start_to_close_timeout=timedelta(seconds=15), retry_policy=_RETRY),
+            # Short lookups: run as local activities on this worker, skipping the
+            # schedule/poll round trips through the server
+            workflow.execute_local_activity(acts.choose_execution, args=[proposal, 25.0], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY),
+            return_exceptions=True,
         )
-        if not ver:
+        # Judge in the original order so the first failure wins
+        _result(docs)
+        if not _result(ver):
             return {"status": "denied", "reason": "evidence_failed"}
-
-        # ASLF attention/liquidity gate
-        aslf = await workflow.execute_activity(
-            acts.compute_aslf_activity, proposal, start_to_close_timeout=timedelta(seconds=15)
-        )
-        gate = await workflow.execute_activity(
-            acts.gate_policy, {**proposal, "_aslf": aslf.get("aslf")}, start_to_close_timeout=timedelta(seconds=10)
+        aslf = _result(aslf)
+        _, gate = await asyncio.gather(
+            workflow.execute_activity(acts.record_aslf, args=[proposal["symbol"], aslf], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY),
+            workflow.execute_local_activity(
+                acts.gate_policy, {**proposal, "_aslf": aslf.get("aslf")}, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY
+            ),
         )
         if not gate:
             return {"status": "denied", "reason": "policy_denied", "aslf": aslf}
-
-        # Risk simulation guard
-        risk_ok = await workflow.execute_activity(acts.risk_simulate, proposal, start_to_close_timeout=timedelta(seconds=15))
-        if not risk_ok.get("ok"):
+        if not _result(risk_ok).get("ok"):
             return {"status": "denied", "reason": "risk_sim_denied", "sim": risk_ok}
-
-        # Probe->Promote bandit for size multiplier
-        band = await workflow.execute_activity(acts.bandit_decide, proposal, start_to_close_timeout=timedelta(seconds=5))
-
-        # Choose execution style
-        choice = await workflow.execute_activity(acts.choose_execution, proposal, 25.0, start_to_close_timeout=timedelta(seconds=10))
+        choice = _result(choice)
+        # Probe->promote bandit; seeds the hypothesis prior on first sight of a key
+        band = await workflow.execute_local_activity(acts.bandit_decide, proposal, start_to_close_timeout=timedelta(seconds=5), retry_policy=_RETRY)
         # Size selection (probe override uses PROBE_SIZE_BPS)
         force_bps = float(band.get("probe_bps", 0.0)) if band.get("is_probe") else None
-        quote_base = await workflow.execute_activity(acts.compute_trade_size, {**proposal, "_aslf": aslf.get("aslf")}, start_to_close_timeout=timedelta(seconds=10), force_probe_bps=force_bps)
+        quote_base = await workflow.execute_activity(acts.compute_trade_size, args=[{**proposal, "_aslf": aslf.get("aslf")}, 10000.0, 0.2, force_bps], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
         quote_qty = max(5.0, quote_base * float(band.get("size_multiplier", 1.0))) if force_bps is None else quote_base
         context = {"aslf": aslf.get("aslf"), "style": choice.get("style"), "impact_bps": choice.get("impact_bps")}
-        if choice.get("style") == "MARKET":
-            exec_res = await workflow.execute_activity(acts.call_executor, {"proposal": proposal, "idempotency_key": f"wf-{proposal.get('symbol','')}", "quote_qty": quote_qty}, start_to_close_timeout=timedelta(seconds=30))
-        else:
-            await workflow.start_child_workflow("MetaOrderWorkflow", {"proposal": proposal, "slices": choice.get("slices", 3), "quote_qty": quote_qty}, id=f"meta-{workflow.info().workflow_id}", task_queue="trader-tq")
-            exec_res = {"code": 202, "body": {"status": "sliced", "symbol": proposal.get("symbol"), "order_id": None}}
-        await workflow.execute_activity(acts.attribute_trade, exec_res, context, start_to_close_timeout=timedelta(seconds=10))
-        # Record hypothesis outcome (bandit upsert)
+        exec_res = await self._execute(proposal, choice, quote_qty)
         # Build minimal exec_ctx with status and symbol
         exec_ctx = {"status": (exec_res.get("body", {}) or {}).get("status"), "symbol": proposal.get("symbol")}
-        await workflow.execute_activity(acts.record_hypothesis_outcome, exec_ctx, start_to_close_timeout=timedelta(seconds=10))
-
-        # Postmortem enqueue as activity (can compute immediately or schedule)
-        await workflow.execute_activity(
-            acts.postmortem_enqueue, exec_res, start_to_close_timeout=timedelta(seconds=10)
+        # Post-trade bookkeeping: attribution, hypothesis outcome (bandit upsert)
+        # and postmortem enqueue are independent; run them together
+        results = await asyncio.gather(
+            workflow.execute_activity(acts.attribute_trade, args=[exec_res, context], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY),
+            workflow.execute_activity(acts.record_hypothesis_outcome, exec_ctx, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY),
+            workflow.execute_activity(
+                acts.postmortem_enqueue, exec_res, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY
+            ),
+            return_exceptions=True,
         )
+        for res in results:
+            _result(res)
+        return {"status": "executed", "order": exec_res}
+
+    async def _execute(self, proposal: Dict[str, Any], choice: Dict[str, Any], quote_qty: float) -> Dict[str, Any]:
+        if choice.get("style") == "MARKET":
+            return await workflow.execute_activity(acts.call_executor, {"proposal": proposal, "idempotency_key": f"wf-{proposal.get('symbol','')}", "quote_qty": quote_qty}, start_to_close_timeout=timedelta(seconds=30), retry_policy=_RETRY)
+        await workflow.start_child_workflow("MetaOrderWorkflow", {"proposal": proposal, "slices": choice.get("slices", 3), "quote_qty": quote_qty}, id=f"meta-{workflow.info().workflow_id}", task_queue="trader-tq")
+        return {"code": 202, "body": {"status": "sliced", "symbol": proposal.get("symbol"), "order_id": None}}
+
+    async def _run_sequential(self, proposal: Dict[str, Any]) -> Dict[str, Any]:
+        # Pre-patch command sequence: one remote activity at a time
+        await workflow.execute_activity(acts.collect_docs, proposal, start_to_close_timeout=timedelta(seconds=30), retry_policy=_RETRY)
+        ver = await workflow.execute_activity(acts.verify_evidence, proposal.get("evidence", []), start_to_close_timeout=timedelta(seconds=60), retry_policy=_RETRY)
+        if not ver:
+            return {"status": "denied", "reason": "evidence_failed"}
+        aslf = await workflow.execute_activity(acts.compute_aslf_activity, proposal, start_to_close_timeout=timedelta(seconds=15), retry_policy=_RETRY)
+        gate = await workflow.execute_activity(acts.gate_policy, {**proposal, "_aslf": aslf.get("aslf")}, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
+        if not gate:
+            return {"status": "denied", "reason": "policy_denied", "aslf": aslf}
+        risk_ok = await workflow.execute_activity(acts.risk_simulate, proposal, start_to_close_timeout=timedelta(seconds=15), retry_policy=_RETRY)
+        if not risk_ok.get("ok"):
+            return {"status": "denied", "reason": "risk_sim_denied", "sim": risk_ok}
+        band = await workflow.execute_activity(acts.bandit_decide, proposal, start_to_close_timeout=timedelta(seconds=5), retry_policy=_RETRY)
+        choice = await workflow.execute_activity(acts.choose_execution, args=[proposal, 25.0], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
+        force_bps = float(band.get("probe_bps", 0.0)) if band.get("is_probe") else None
+        quote_base = await workflow.execute_activity(acts.compute_trade_size, args=[{**proposal, "_aslf": aslf.get("aslf")}, 10000.0, 0.2, force_bps], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
+        quote_qty = max(5.0, quote_base * float(band.get("size_multiplier", 1.0))) if force_bps is None else quote_base
+        context = {"aslf": aslf.get("aslf"), "style": choice.get("style"), "impact_bps": choice.get("impact_bps")}
+        exec_res = await self._execute(proposal, choice, quote_qty)
+        await workflow.execute_activity(acts.attribute_trade, args=[exec_res, context], start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
+        exec_ctx = {"status": (exec_res.get("body", {}) or {}).get("status"), "symbol": proposal.get("symbol")}
+        await workflow.execute_activity(acts.record_hypothesis_outcome, exec_ctx, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
+        await workflow.execute_activity(acts.postmortem_enqueue, exec_res, start_to_close_timeout=timedelta(seconds=10), retry_policy=_RETRY)
         return {"status": "executed", "order": exec_res}
 
 
@@ -83,24 +158,32 @@ class TraderWorkflow:
 class PostmortemWorkflow:
     @workflow.run
     async def run(self, exec_result: Dict[str, Any]) -> None:
-        with workflow.unsafe.imports_passed_through():
-            from apps.temporal_worker import activities as acts
         await workflow.execute_activity(
-            acts.compute_counterfactual, exec_result, start_to_close_timeout=timedelta(seconds=30)
+            acts.compute_counterfactual, exec_result, start_to_close_timeout=timedelta(seconds=30), retry_policy=_RETRY
         )
 
 @workflow.defn
 class MetaOrderWorkflow:
     @workflow.run
     async def run(self, params: Dict[str, Any]) -> None:
-        with workflow.unsafe.imports_passed_through():
-            from apps.temporal_worker import activities as acts
         proposal = params.get("proposal", {})
         slices = int(params.get("slices", 3))
         quote_qty = float(params.get("quote_qty", 20))
         per_slice = max(1.0, quote_qty / max(1, slices))
-        for i in range(slices):
-            await workflow.execute_activity(acts.call_executor, {"proposal": proposal, "idempotency_key": f"slice-{i}-{proposal.get('symbol','')}", "quote_qty": per_slice}, start_to_close_timeout=timedelta(seconds=20))
-            await workflow.sleep(timedelta(seconds=1))
-
-
+        if not workflow.patched(_PATCH_BATCH_SLICES):
+            # Pre-patch sequence: one activity per slice, paced by workflow timers
+            for i in range(slices):
+                await workflow.execute_activity(acts.call_executor, {"proposal": proposal, "idempotency_key": f"slice-{i}-{proposal.get('symbol','')}", "quote_qty": per_slice}, start_to_close_timeout=timedelta(seconds=20), retry_policy=_RETRY)
+                await workflow.sleep(timedelta(seconds=1))
+            return
+        # One activity sends every slice (paced in the activity); retries resume
+        # from the last heartbeated slice. It heartbeats around each order send
+        # (15s HTTP timeout), so a worker that dies mid-batch is noticed after
+        # heartbeat_timeout rather than the whole start_to_close
+        await workflow.execute_activity(
+            acts.call_executor_batch,
+            {"proposal": proposal, "slices": slices, "quote_qty": per_slice},
+            start_to_close_timeout=timedelta(seconds=21 * max(1, slices)),
+            heartbeat_timeout=timedelta(seconds=max(20.0, 3 * acts.SLICE_INTERVAL_S)),
+            retry_policy=_RETRY,
+        )
@@ -0,0 +1,9 @@
+-- Indexes for the optimizer's time-window aggregations
+
+-- Rows are appended roughly in time order, so a BRIN index stays tiny and
+-- lets range scans on closed_at / ts skip everything outside the window
+CREATE INDEX IF NOT EXISTS idx_positions_closed_at_brin ON positions USING BRIN (closed_at);
+CREATE INDEX IF NOT EXISTS idx_attention_aslf_ts_brin ON attention_aslf USING BRIN (ts);
+
+-- Per-symbol lookups over closed positions (bandit update, ASLF join)
+CREATE INDEX IF NOT EXISTS idx_positions_symbol_closed ON positions(symbol, closed_at DESC) WHERE closed_at IS NOT NULL;
@@ -0,0 +1,4 @@
+-- HTTP validators captured at verify time; reverify sends them as a
+-- conditional GET and treats 304 as unchanged without re-hashing
+alter table evidence_artifacts add column if not exists etag text;
+alter table evidence_artifacts add column if not exists last_modified text;
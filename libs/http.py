@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import weakref
+import httpx
+
+
+# One pooled client per event loop, so repeat calls reuse keep-alive
+# connections. Keyed by loop since connections are bound to the loop that
+# opened them; a loop in another thread or a fresh asyncio.run() gets its own
+# client instead of replacing (and leaking) someone else's.
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def shared_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        client = _CLIENTS.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_keepalive_connections=20))
+            _CLIENTS[loop] = client
+    return client
+
+
+async def aclose_shared_client():
+    # Closes the running loop's client; call before that loop ends
+    with _LOCK:
+        client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run(coro):
+    """asyncio.run() for sync callers; closes the loop's shared client before the loop ends."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await aclose_shared_client()
+
+    return asyncio.run(main())
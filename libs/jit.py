@@ -0,0 +1,26 @@
+"""
+numba entry point shared by the compiled kernels.
+
+Kernels compile on first call (or load from the on-disk cache). Modules
+register a sample call with warmup(); the Temporal worker runs warm() at
+startup so the first risk check isn't charged the JIT time, while other
+importers (gateway, scripts) pay nothing at import.
+"""
+
+from numba import njit
+
+__all__ = ["njit", "warmup", "warm"]
+
+_WARMUPS: list = []
+
+
+def warmup(fn, *args):
+    """Register fn(*args) to run when warm() is called; returns fn."""
+    _WARMUPS.append((fn, args))
+    return fn
+
+
+def warm() -> None:
+    """Compile every registered kernel. Blocking; run it off the event loop."""
+    for fn, args in _WARMUPS:
+        fn(*args)
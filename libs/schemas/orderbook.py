@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def _levels(levels) -> np.ndarray:
+    # Exchanges send [price, qty, ...] rows of numeric strings; parse them in one pass
+    if len(levels) == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    return np.asarray([lv[:2] for lv in levels], dtype=np.float64)
+
+
+@dataclass(slots=True)
+class OrderBook:
+    """Order book as price/size columns, best level first on each side."""
+
+    bid_prices: np.ndarray
+    bid_sizes: np.ndarray
+    ask_prices: np.ndarray
+    ask_sizes: np.ndarray
+
+    @classmethod
+    def from_levels(cls, bids, asks) -> "OrderBook":
+        b, a = _levels(bids), _levels(asks)
+        return cls(b[:, 0], b[:, 1], a[:, 0], a[:, 1])
+
+    @classmethod
+    def empty(cls) -> "OrderBook":
+        return cls.from_levels([], [])
+
+    def side(self, side: str) -> tuple[np.ndarray, np.ndarray]:
+        """Levels a taker order on `side` would fill against."""
+        if side.lower() == "buy":
+            return self.ask_prices, self.ask_sizes
+        return self.bid_prices, self.bid_sizes
+
+    def mid_price(self) -> Optional[float]:
+        if len(self.bid_prices) == 0 or len(self.ask_prices) == 0:
+            return None
+        return float(self.bid_prices[0] + self.ask_prices[0]) / 2
+
+    def to_legacy_lists(self) -> Dict[str, List[List[float]]]:
+        return {
+            "bids": np.column_stack((self.bid_prices, self.bid_sizes)).tolist(),
+            "asks": np.column_stack((self.ask_prices, self.ask_sizes)).tolist(),
+        }
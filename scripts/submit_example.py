@@ -2,21 +2,23 @@ import asyncio, time
 from temporalio.client import Client
 from apps.agent_brain.graph import compiled
 from apps.temporal_worker.workflows import TraderWorkflow
+from apps.temporal_worker.converter import DATA_CONVERTER
 
 
 async def main():
     # Build a proposal using the agent stub
     draft = {"text": "Demo headline: BTC ETF inflows"}
-    result = compiled.invoke(draft)
+    result = await compiled.ainvoke(draft)
     proposal = result["proposal"]
 
-    client = await Client.connect("localhost:7233")
+    client = await Client.connect("localhost:7233", data_converter=DATA_CONVERTER)
     wf_id = f"demo-{int(time.time())}"
     handle = await client.start_workflow(
         TraderWorkflow.run,
         proposal,
         id=wf_id,
         task_queue="trader-tq",
+        request_eager_start=True,
     )
     out = await handle.result()
     print({"workflow_id": wf_id, "result": out})
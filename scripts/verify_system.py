@@ -6,29 +6,27 @@ import os
 from temporalio.client import Client
 
 async def test_temporal_connection():
-    """Test Temporal connection."""
+    """Test Temporal connection; returns the client for the later status check."""
     try:
         client = await Client.connect("localhost:7233")
         print("✅ Temporal connection: OK")
-        await client.close()
-        return True
+        return client
     except Exception as e:
         print(f"❌ Temporal connection failed: {e}")
-        return False
+        return None
 
-async def test_gateway():
+async def test_gateway(http: httpx.AsyncClient):
     """Test gateway endpoint."""
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get("http://localhost:8000/status")
-            if r.status_code == 200:
-                print("✅ Gateway: OK")
-                return True
+        r = await http.get("/status", timeout=10)
+        if r.status_code == 200:
+            print("✅ Gateway: OK")
+            return True
     except Exception as e:
         print(f"❌ Gateway failed: {e}")
     return False
 
-async def test_workflow_submission():
+async def test_workflow_submission(http: httpx.AsyncClient):
     """Submit a test workflow and check if it processes."""
     proposal = {
         "action": "open",
@@ -50,28 +48,25 @@ async def test_workflow_submission():
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(
-                "http://localhost:8000/submit-proposal",
-                json={"proposal": proposal},
-                headers={"Idempotency-Key": f"verify-{os.getpid()}"}
-            )
-            if r.status_code == 200:
-                result = r.json()
-                print(f"✅ Workflow submitted: {result.get('workflow_id')}")
-                return result.get('workflow_id')
+        r = await http.post(
+            "/submit-proposal",
+            json={"proposal": proposal},
+            headers={"Idempotency-Key": f"verify-{os.getpid()}"}
+        )
+        if r.status_code == 200:
+            result = r.json()
+            print(f"✅ Workflow submitted: {result.get('workflow_id')}")
+            return result.get('workflow_id')
     except Exception as e:
         print(f"❌ Workflow submission failed: {e}")
     return None
 
-async def check_workflow_status(workflow_id):
+async def check_workflow_status(client: Client, workflow_id):
     """Check if workflow is running."""
     try:
-        client = await Client.connect("localhost:7233")
         handle = client.get_workflow_handle(workflow_id)
         result = await handle.result(timeout=60)
         print(f"✅ Workflow completed: {result}")
-        await client.close()
         return True
     except Exception as e:
         print(f"⚠️  Workflow status check: {e}")
@@ -81,22 +76,24 @@ async def main():
     print("🔍 Verifying system...")
     print()
     
-    # Test connections
-    temporal_ok = await test_temporal_connection()
-    gateway_ok = await test_gateway()
-    
-    if not temporal_ok or not gateway_ok:
-        print("\n❌ Basic connections failed. Check services.")
-        return
-    
-    # Submit workflow
-    print("\n📤 Submitting test workflow...")
-    workflow_id = await test_workflow_submission()
-    
+    # One gateway connection and one Temporal connection serve every check
+    async with httpx.AsyncClient(base_url="http://localhost:8000", timeout=30) as http:
+        # Test connections
+        temporal = await test_temporal_connection()
+        gateway_ok = await test_gateway(http)
+
+        if temporal is None or not gateway_ok:
+            print("\n❌ Basic connections failed. Check services.")
+            return
+
+        # Submit workflow
+        print("\n📤 Submitting test workflow...")
+        workflow_id = await test_workflow_submission(http)
+
     if workflow_id:
         print(f"\n⏳ Waiting for workflow to process...")
         await asyncio.sleep(10)
-        await check_workflow_status(workflow_id)
+        await check_workflow_status(temporal, workflow_id)
     
     print("\n✅ Verification complete!")
 
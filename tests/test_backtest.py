@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from apps.backtest import framework
+from apps.backtest.framework import BacktestEngine
+
+
+def _bars(n=300):
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="1min"),
+        "open": close,
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": 1.0,
+        "quote_volume": close,
+    })
+
+
+def _flip_strategy(row, engine):
+    minute = row["open_time"].minute
+    if minute % 17 == 0:
+        return {"action": "buy", "quote_qty": 1000.0}
+    if minute % 29 == 0:
+        return {"action": "sell", "quote_qty": 500.0}
+    return None
+
+
+def test_backtest_run_trades_and_equity():
+    data = _bars()
+    res = BacktestEngine().run(data, _flip_strategy)
+    assert res.total_trades > 0
+    assert len(res.equity_curve) == len(data)
+    assert res.winning_trades + res.losing_trades <= res.total_trades
+    assert res.max_drawdown <= 0.0
+    assert np.isclose(res.equity_curve.iloc[-1] - 10000.0, res.total_return)
+    assert all(t.status == "closed" for t in res.trades)
+
+
+def _flip_strategy_attrs(row, engine):
+    # Written against the old per-row Series: attribute access
+    minute = row.open_time.minute
+    if minute % 17 == 0 and row.close > 0:
+        return {"action": "buy", "quote_qty": 1000.0}
+    if minute % 29 == 0:
+        return {"action": "sell", "quote_qty": 500.0}
+    return None
+
+
+def test_attribute_access_strategy_matches():
+    data = _bars()
+    ref = BacktestEngine().run(data, _flip_strategy)
+    res = BacktestEngine().run(data, _flip_strategy_attrs)
+    assert res.total_trades == ref.total_trades > 0
+    assert np.isclose(res.total_return, ref.total_return)
+
+
+def test_backtest_no_signals():
+    res = BacktestEngine().run(_bars(50), lambda row, engine: None)
+    assert res.total_trades == 0
+    assert res.total_return == 0.0
+
+
+def test_run_signals_matches_run():
+    data = _bars()
+    ref = BacktestEngine().run(data, _flip_strategy)
+    minute = data["open_time"].dt.minute.to_numpy()
+    actions = np.where(minute % 17 == 0, 1, np.where(minute % 29 == 0, -1, 0))
+    qty = np.where(minute % 17 == 0, 1000.0, 500.0)
+    res = BacktestEngine().run_signals(data, actions, qty)
+    assert res.total_trades == ref.total_trades
+    assert np.isclose(res.total_return, ref.total_return)
+    assert np.allclose(res.equity_curve.to_numpy(), ref.equity_curve.to_numpy())
+    assert [t.pnl for t in res.trades] == pytest.approx([t.pnl for t in ref.trades])
+
+
+class _FlipSignals:
+    def signals(self, data):
+        minute = data["open_time"].dt.minute
+        action = np.where(minute % 17 == 0, "buy", np.where(minute % 29 == 0, "sell", "hold"))
+        qty = np.where(minute % 17 == 0, 1000.0, 500.0)
+        return pd.DataFrame({"action": action, "quote_qty": qty}, index=data.index)
+
+
+def test_vectorized_strategy_matches_row_strategy():
+    data = _bars()
+    ref = BacktestEngine().run(data, _flip_strategy)
+    res = BacktestEngine().run(data, _FlipSignals())
+    assert res.total_trades == ref.total_trades
+    assert np.isclose(res.total_return, ref.total_return)
+
+
+@pytest.fixture
+def klines_api(monkeypatch):
+    calls = []
+    row = [1704067200000, "1", "1", "1", "1", "1", 1704067259999, "1", 1, "0", "0", "0"]
+
+    def handler(request):
+        calls.append(request.url.params)
+        return httpx.Response(200, json=[row])
+
+    real_client = httpx.Client
+    monkeypatch.setattr(framework.httpx, "Client", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+    framework._fetch_klines_window.cache_clear()
+    yield calls
+    framework._fetch_klines_window.cache_clear()
+
+
+def test_open_ended_klines_refetch(klines_api):
+    engine = BacktestEngine()
+    assert len(engine.load_historical_data("BTCUSDT")) == 1
+    assert len(engine.load_historical_data("BTCUSDT")) == 1
+    assert len(klines_api) == 2
+
+
+def test_bounded_klines_cached(klines_api):
+    engine = BacktestEngine(start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 2))
+    assert len(engine.load_historical_data("BTCUSDT")) == 1
+    assert len(engine.load_historical_data("BTCUSDT")) == 1
+    assert len(klines_api) == 1
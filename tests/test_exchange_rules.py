@@ -0,0 +1,14 @@
+from apps.executor.utils.exchange_rules import validate_order_filters
+
+
+def test_lot_size_accepts_whole_steps():
+    info = {"symbol": "X", "filters": [{"filterType": "LOT_SIZE", "stepSize": "0.1"}]}
+    # 0.3 / 0.1 == 2.9999999999999996 in floating point
+    assert validate_order_filters(info, 1.0, 0.3) == (True, None)
+    assert validate_order_filters(info, 1.0, 0.35)[0] is False
+
+
+def test_min_notional():
+    info = {"symbol": "X", "filters": [{"filterType": "MIN_NOTIONAL", "minNotional": "10"}]}
+    assert validate_order_filters(info, 50000.0, 5.0)[0] is False
+    assert validate_order_filters(info, 50000.0, 20.0) == (True, None)
@@ -1,12 +1,27 @@
-import os
 import pytest
+import httpx
 from fastapi.testclient import TestClient
 from apps.executor.app import app
-from tests.conftest import my_vcr
+from apps.executor.utils import market_data
 
 
 client = TestClient(app)
 
+# One BTCUSDT 1m kline: [open time, open, high, low, close, volume, ...]
+KLINES = [[1700000000000, "37000.00", "37050.00", "36990.00", "37020.50", "12.3", 1700000059999, "455000.0", 100, "6.1", "225000.0", "0"]]
+
+
+@pytest.fixture
+def binance(monkeypatch):
+    # Serve market data from memory instead of the network
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v3/klines":
+            return httpx.Response(200, json=KLINES)
+        return httpx.Response(404)
+
+    monkeypatch.setattr(market_data, "shared_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(market_data, "_CLOSES", {})
+
 
 def test_status_ok():
     r = client.get("/status")
@@ -14,8 +29,7 @@ def test_status_ok():
     assert r.json().get("ok") is True
 
 
-@my_vcr.use_cassette("price_btcusdt_1m.yaml")
-def test_price_public_klines():
+def test_price_public_klines(binance):
     r = client.get("/price", params={"symbol": "BTCUSDT"})
     assert r.status_code == 200
     body = r.json()
@@ -23,13 +37,11 @@ def test_price_public_klines():
     assert float(body["price"]) > 0
 
 
-@my_vcr.use_cassette("price_btcusdt_1m.yaml")
-def test_orders_dry_run_simulated():
-    os.environ["EXEC_MODE"] = "dry_run"
+def test_orders_dry_run_simulated(binance, monkeypatch):
+    monkeypatch.setenv("EXEC_MODE", "dry_run")
     body = {"symbol": "BTCUSDT", "side": "buy", "quote_qty": 20, "venue": "binance", "idempotency_key": "t-1"}
     r = client.post("/orders", json=body)
     assert r.status_code == 200
     data = r.json()["body"]
     assert data["status"] == "simulated"
     assert float(data["avg_price"]) > 0
-
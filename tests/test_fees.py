@@ -0,0 +1,46 @@
+import pytest
+
+from apps.executor.utils.fees import estimate_slippage_from_orderbook
+from libs.schemas.orderbook import OrderBook
+
+
+BOOK = {
+    "bids": [["99.0", "1.0"], ["98.0", "2.0"], ["97.0", "5.0"]],
+    "asks": [["101.0", "1.0"], ["102.0", "2.0"], ["103.0", "5.0"]],
+}
+
+
+def test_slippage_within_first_level():
+    # Measured from the 100.0 mid, so a touch fill costs the half-spread
+    slip, avg = estimate_slippage_from_orderbook("BTCUSDT", "buy", 50.0, BOOK)
+    assert avg == 101.0
+    assert slip == pytest.approx(100.0)
+    slip, avg = estimate_slippage_from_orderbook("BTCUSDT", "sell", 50.0, BOOK)
+    assert avg == 99.0
+    assert slip == pytest.approx(100.0)
+
+
+def test_slippage_walks_levels():
+    # 101 fills in full, then 204 of 102's 204 notional, then 100 at 103
+    slip, avg = estimate_slippage_from_orderbook("BTCUSDT", "buy", 405.0, BOOK)
+    base = 1.0 + 2.0 + 100.0 / 103.0
+    assert avg == pytest.approx(405.0 / base)
+    assert slip == pytest.approx((405.0 / base - 100.0) / 100.0 * 10000)
+
+
+def test_slippage_book_exhausted():
+    slip, avg = estimate_slippage_from_orderbook("BTCUSDT", "sell", 1e6, BOOK)
+    assert avg == pytest.approx((99.0 + 196.0 + 485.0) / 8.0)
+
+
+def test_slippage_empty_book():
+    assert estimate_slippage_from_orderbook("BTCUSDT", "buy", 10.0, {"bids": [], "asks": []}) == (0.0, 0.0)
+
+
+def test_orderbook_columns_match_level_lists():
+    ob = OrderBook.from_levels(BOOK["bids"], BOOK["asks"])
+    assert ob.mid_price() == 100.0
+    assert ob.to_legacy_lists()["asks"][1] == [102.0, 2.0]
+    for side in ("buy", "sell"):
+        assert estimate_slippage_from_orderbook("BTCUSDT", side, 405.0, ob) == \
+            estimate_slippage_from_orderbook("BTCUSDT", side, 405.0, BOOK)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from apps.executor.impact import (
+    calculate_optimal_slices,
+    calculate_optimal_slices_vec,
+    estimate_slippage_bps,
+    estimate_slippage_bps_vec,
+)
+
+
+def test_vectorized_impact_matches_scalar():
+    spread = np.array([0.5, 2.0, 8.0, 20.0])
+    depth = np.array([0.2, 1.0, 5.0, 50.0])
+    notional = np.array([10.0, 1_000.0, 50_000.0, 2_000_000.0])
+    vol = np.array([0.0, 0.01, 0.02, 0.06])
+    slip = estimate_slippage_bps_vec(spread, depth, notional, vol)
+    slices = calculate_optimal_slices_vec(notional, vol, depth, 10.0)
+    for i in range(len(spread)):
+        assert np.isclose(slip[i], estimate_slippage_bps(spread[i], depth[i], notional[i], vol[i]))
+        assert slices[i] == calculate_optimal_slices(notional[i], vol[i], depth[i], 10.0)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from apps.risk.metrics import (
+    compute_fractional_kelly,
+    deflated_sharpe_ratio,
+    update_ath_metrics,
+    update_ath_metrics_series,
+)
+
+
+def test_ath_series_matches_scalar_updates():
+    equity = [10000.0, 10050.0, 9980.0, 9900.0, 10120.0, 10090.0, 9800.0]
+    prev_equity, prev_hwm, prev_mdd = 10000.0, 10010.0, 5.0
+    expected = []
+    for e in equity:
+        hwm, mdd, romad, gain = update_ath_metrics(prev_equity, prev_hwm, prev_mdd, e)
+        expected.append((hwm, mdd, romad, gain))
+        prev_equity, prev_hwm, prev_mdd = e, hwm, mdd
+    got = update_ath_metrics_series(equity, 10000.0, 10010.0, 5.0)
+    assert np.column_stack(got) == pytest.approx(np.array(expected))
+
+
+def test_ath_series_empty():
+    hwm, mdd, romad, gain = update_ath_metrics_series([])
+    assert hwm.size == mdd.size == romad.size == gain.size == 0
+
+
+def test_dsr_matches_plain_numpy():
+    # fastmath reassociates the sums, so compare within FP tolerance
+    returns = np.random.default_rng(0).normal(0.001, 0.01, 500)
+    expected = max(0.0, returns.mean() / returns.std() * 0.8)
+    assert deflated_sharpe_ratio(returns) == pytest.approx(expected)
+    assert deflated_sharpe_ratio([]) == 0.0
+
+
+def test_fractional_kelly_caps():
+    assert compute_fractional_kelly(0.02, 0.04, 0.2, 10000.0) == pytest.approx(2000.0)
+    assert compute_fractional_kelly(0.01, 0.04, 0.5, 10000.0) == pytest.approx(2500.0)
+    assert compute_fractional_kelly(0.01, 0.0, 0.5, 10000.0) == 0.0
@@ -10,7 +10,7 @@ async def test_workflow_happy_path(monkeypatch):
     # Ensure dry_run
     monkeypatch.setenv("EXEC_MODE", "dry_run")
     # Proposal via agent stub
-    result = compiled.invoke({"text": "Demo"})
+    result = await compiled.ainvoke({"text": "Demo"})
     proposal = result["proposal"]
     # Connect to local Temporal (assumes compose running)
     client = await Client.connect("localhost:7233")